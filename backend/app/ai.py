@@ -1,12 +1,36 @@
-from openai import OpenAI
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from uuid import UUID
+
+from . import llm
 from .config import settings
+from .log import fields
+
+FALLBACK_ANSWER = "I honestly have no idea."
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
-def generate_impostor_answer(question: str, player_answers: list[str]) -> str:
+def generate_impostor_answer(question: str, player_answers: list[str], draft: Optional[str] = None) -> str:
     """
     Generates an AI answer that tries to blend in with player answers.
     """
+    return generate_impostor_answer_with_usage(question, player_answers, draft)[0]
+
+
+def generate_impostor_answer_with_usage(
+    question: str, player_answers: list[str], draft: Optional[str] = None
+) -> tuple[str, int]:
+    """
+    Same as generate_impostor_answer, also returning the total tokens used.
+    A draft written from the question alone may be passed in to refine.
+    """
+    return _complete(_impostor_request(question, player_answers, draft))
+
+
+def _impostor_request(question: str, player_answers: list[str], draft: Optional[str] = None) -> llm.LLMRequest:
     # Inject answers into prompt
     # Format answers as a clean bulleted list
     formatted_answers = "\n".join([f"{a}" for a in player_answers])
@@ -32,21 +56,141 @@ def generate_impostor_answer(question: str, player_answers: list[str]) -> str:
     - Your answer MUST be in all lowercase letters.
     - Do not wrap your answer in quotes.
     """
+    if draft:
+        prompt += f"""
+    Before seeing the other answers you drafted this one. Keep it if it already blends in, otherwise rewrite it:
+    {draft}
+    """
     
-    print(f"DEBUG: AI Prompt:\n{prompt}")
+    logger.debug("impostor prompt", extra=fields(sampled=True, prompt=prompt))
+    return llm.LLMRequest("impostor", question, tuple(player_answers), prompt, draft)
+
 
+def generate_draft_answer(question: str) -> tuple[str, int]:
+    """
+    Drafts an impostor answer from the question alone, before any player has
+    answered. Returns the text and the total tokens used.
+    """
+    prompt = f"""
+    You are playing a party game where you need to blend in with other players.
+    
+    Question: "{question}"
+    
+    Write ONE short answer to the question the way a typical player would type it on their phone.
+    Instructions:
+    - Be humorous, casual, and human-like.
+    - Do not use hashtags or emojis.
+    - Output ONLY the raw answer text. No quotes, no explanations.
+    - Your answer MUST be in all lowercase letters.
+    """
+    return _complete(llm.LLMRequest("draft", question, (), prompt))
+
+
+def _complete(request: llm.LLMRequest) -> tuple[str, int]:
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini", # Cost-effective and fast
-            messages=[
-                {"role": "system", "content": "You are a player in a casual party game trying to blend in."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.9, # High creativity
-        )
-        return response.choices[0].message.content.strip()
+        return tuple(llm.complete(request))
     except Exception as e:
-        print(f"OpenAI Error: {e}")
-        return "I honestly have no idea." # Fallback answer
+        logger.warning("LLM call failed, using the fallback answer", extra=fields(kind=request.kind, error=str(e)))
+        return FALLBACK_ANSWER, 0
+
+
+class SpeculativeCache:
+    """
+    Impostor answers generated before the last player answer is in, keyed by
+    Round.id. submit_answer starts one once AI_SPECULATIVE_FRACTION of the
+    answers have arrived; the generation job takes it instead of calling the
+    LLM again, unless AI_SPECULATIVE_REGENERATE asks for a fresh answer that
+    has seen every player answer.
+    """
+
+    def __init__(self, max_rounds: int = 1024):
+        self.max_rounds = max_rounds
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=settings.AI_WORKERS, thread_name_prefix="ai-prefetch")
+        # round_id -> (number of answers it was generated from, future)
+        self._entries: OrderedDict[UUID, tuple[int, Future]] = OrderedDict()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.regenerated = 0
+        self.used_tokens = 0
+        self.wasted_tokens = 0
+
+    def has(self, round_id: UUID) -> bool:
+        with self._lock:
+            return round_id in self._entries
+
+    def prefetch(self, round_id: UUID, question: str, player_answers: list[str]):
+        evicted = []
+        with self._lock:
+            if round_id in self._entries:
+                return
+            # Straight to the LLM, not through _complete: a failed call must reach
+            # take() as an error rather than as the fallback answer
+            request = _impostor_request(question, list(player_answers))
+            future = self._executor.submit(lambda: tuple(llm.complete(request)))
+            self._entries[round_id] = (len(player_answers), future)
+            self.started += 1
+            while len(self._entries) > self.max_rounds:
+                # Rounds that never finished answering; their tokens are lost
+                evicted.append(self._entries.popitem(last=False)[1][1])
+        # Outside the lock: a callback on a finished future runs immediately
+        for future in evicted:
+            future.add_done_callback(self._waste)
+
+    def take(self, round_id: UUID, answer_count: int):
+        """
+        Returns the speculative answer for the round, waiting for it if it is
+        still in flight, or None if the caller should generate one itself.
+        """
+        with self._lock:
+            entry = self._entries.pop(round_id, None)
+            if entry is None:
+                if settings.AI_SPECULATIVE_FRACTION:
+                    self.misses += 1
+                return None
+            generated_from, future = entry
+            regenerate = settings.AI_SPECULATIVE_REGENERATE and generated_from < answer_count
+            if regenerate:
+                self.regenerated += 1
+
+        if regenerate:
+            future.add_done_callback(self._waste)
+            return None
+        try:
+            text, tokens = future.result(timeout=settings.AI_TIMEOUT_SECONDS)
+        except Exception as e:
+            # Failed or too slow: a miss, and the job makes its own call
+            logger.warning("speculative impostor answer failed", extra=fields(round_id=round_id, error=str(e)))
+            future.add_done_callback(self._waste)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.used_tokens += tokens
+        return text
+
+    def _waste(self, future: Future):
+        if future.cancelled() or future.exception():
+            return
+        with self._lock:
+            self.wasted_tokens += future.result()[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            taken = self.hits + self.misses + self.regenerated
+            return {
+                "started": self.started,
+                "pending": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "regenerated": self.regenerated,
+                "hit_rate": self.hits / taken if taken else 0.0,
+                "used_tokens": self.used_tokens,
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+
+speculative = SpeculativeCache()
 
@@ -0,0 +1,185 @@
+import logging
+import queue
+import select
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+from .log import fields
+
+CHANNEL = "partygame_rooms"
+RECONNECT_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class _ThreadedBus:
+    """
+    Shares room notifications between processes. publish() only queues the
+    code, so callers on the event loop never wait on the network; a sender
+    thread broadcasts it and a listener thread hands codes published by
+    other processes to on_message. Messages carry the sending process's id
+    so a process doesn't receive its own (it delivers those locally).
+    After a dropped connection on_reconnect is called, since anything
+    published meanwhile was missed.
+    """
+
+    def __init__(self, on_message: Callable[[str], None], on_reconnect: Callable[[], None]):
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self.origin = uuid.uuid4().hex[:12]
+        self._outbox: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self.sent = 0
+        self.received = 0
+        self.reconnects = 0
+
+    def start(self):
+        for target, name in ((self._send_loop, "bus-send"), (self._listen_loop, "bus-listen")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        self._outbox.put(None)
+
+    def publish(self, code: str):
+        self._outbox.put(code)
+
+    def _receive(self, payload: str):
+        origin, _, code = payload.partition(":")
+        if origin != self.origin and code:
+            self.received += 1
+            self.on_message(code)
+
+    def _send_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._run_sender()
+            except Exception as e:
+                logger.warning("Event bus send error", extra=fields(error=str(e)))
+                time.sleep(RECONNECT_SECONDS)
+
+    def _listen_loop(self):
+        first = True
+        while not self._stop.is_set():
+            try:
+                self._run_listener(on_ready=None if first else self._reconnected)
+            except Exception as e:
+                logger.warning("Event bus listen error", extra=fields(error=str(e)))
+                time.sleep(RECONNECT_SECONDS)
+            first = False
+
+    def _reconnected(self):
+        self.reconnects += 1
+        self.on_reconnect()
+
+    def _next_codes(self) -> Optional[set]:
+        # Blocks for one code, then takes whatever else is queued (duplicates coalesce)
+        code = self._outbox.get()
+        if code is None:
+            return None
+        codes = {code}
+        while True:
+            try:
+                code = self._outbox.get_nowait()
+            except queue.Empty:
+                return codes
+            if code is None:
+                return codes
+            codes.add(code)
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "received": self.received, "reconnects": self.reconnects,
+                "queued": self._outbox.qsize()}
+
+
+class PostgresBus(_ThreadedBus):
+    """LISTEN/NOTIFY on the application database; nothing else to run."""
+
+    def __init__(self, database_url: str, on_message, on_reconnect):
+        super().__init__(on_message, on_reconnect)
+        # psycopg2 takes the plain postgresql:// form of the SQLAlchemy URL
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def _run_sender(self):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                while True:
+                    codes = self._next_codes()
+                    if codes is None:
+                        return
+                    for code in codes:
+                        cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, f"{self.origin}:{code}"))
+                        self.sent += 1
+        finally:
+            conn.close()
+
+    def _run_listener(self, on_ready):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            if on_ready:
+                on_ready()
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 5)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        self._receive(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+class RedisBus(_ThreadedBus):
+    """Redis pub/sub; needs the optional redis package and a reachable REDIS_URL."""
+
+    def __init__(self, redis_url: str, on_message, on_reconnect):
+        super().__init__(on_message, on_reconnect)
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+
+    def _run_sender(self):
+        while True:
+            codes = self._next_codes()
+            if codes is None:
+                return
+            for code in codes:
+                self.client.publish(CHANNEL, f"{self.origin}:{code}")
+                self.sent += 1
+
+    def _run_listener(self, on_ready):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            if on_ready:
+                on_ready()
+            while not self._stop.is_set():
+                message = pubsub.get_message(timeout=5)
+                if message:
+                    self._receive(message["data"].decode())
+        finally:
+            pubsub.close()
+
+
+def build_bus(on_message, on_reconnect) -> Optional[_ThreadedBus]:
+    """The configured EVENT_BUS, or None for "inprocess" (a single process)."""
+    if settings.EVENT_BUS == "inprocess":
+        return None
+    if settings.EVENT_BUS == "postgres":
+        return PostgresBus(settings.DATABASE_URL, on_message, on_reconnect)
+    if settings.EVENT_BUS == "redis":
+        return RedisBus(settings.REDIS_URL, on_message, on_reconnect)
+    raise ValueError(f"Unknown EVENT_BUS {settings.EVENT_BUS!r}, expected 'inprocess', 'postgres' or 'redis'")
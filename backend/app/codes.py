@@ -0,0 +1,130 @@
+import math
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .config import settings
+from .sharding import owns
+
+# Candidates tried before giving up; with a pool that isn't nearly full
+# the first one almost always succeeds
+MAX_ATTEMPTS = 20
+
+
+class RoomCodesExhausted(RuntimeError):
+    pass
+
+
+class CodeAllocator:
+    """
+    Hands out room codes from a fixed pool of len(alphabet) ** length codes,
+    walked in a shuffled order (an affine permutation of the pool index, so
+    nothing needs to be stored). Every process walks the same order from a
+    random starting point, so a code only comes round again once the rest of
+    the pool has been used. The unique index on games.code is the source of
+    truth: a taken code is skipped, and one held by a stale game is released
+    (set to NULL) and reused in the same transaction. A game is stale once
+    it has been idle (no update) for recycle_after, or finished for
+    finished_ttl, the time the sweeper keeps it for the final leaderboard.
+    """
+
+    def __init__(self, alphabet: str, length: int, recycle_after: timedelta, finished_ttl: timedelta):
+        if not 1 <= length <= 10:
+            raise ValueError("ROOM_CODE_LENGTH must be between 1 and 10 (games.code is String(10))")
+        self.alphabet = alphabet
+        self.length = length
+        self.recycle_after = recycle_after
+        self.finished_ttl = finished_ttl
+        self.size = len(alphabet) ** length
+
+        rng = random.Random(self.size)
+        self._multiplier = rng.randrange(1, self.size)
+        while math.gcd(self._multiplier, self.size) != 1:
+            self._multiplier = rng.randrange(1, self.size)
+        self._offset = rng.randrange(self.size)
+
+        self._lock = threading.Lock()
+        self._cursor = random.randrange(self.size)
+        self.allocated = 0
+        self.collisions = 0
+        self.recycled = 0
+
+    def code_at(self, index: int) -> str:
+        n = (self._multiplier * index + self._offset) % self.size
+        chars = []
+        for _ in range(self.length):
+            n, digit = divmod(n, len(self.alphabet))
+            chars.append(self.alphabet[digit])
+        return "".join(reversed(chars))
+
+    def _next_code(self) -> str:
+        # With sharding, only codes this node owns, so the new room is served here
+        for _ in range(self.size):
+            with self._lock:
+                index = self._cursor
+                self._cursor = (index + 1) % self.size
+            code = self.code_at(index)
+            if owns(code):
+                return code
+        raise RoomCodesExhausted("No room code in the pool is owned by this node")
+
+    async def create_game(self, db: AsyncSession) -> models.Game:
+        """
+        Inserts and commits a new Game under the next free code. Each attempt
+        is its own transaction, so a code lost to a concurrent request just
+        moves on to the next candidate.
+        """
+        for _ in range(MAX_ATTEMPTS):
+            code = self._next_code()
+            now = datetime.now(timezone.utc)
+            released = await db.execute(
+                update(models.Game)
+                .where(
+                    models.Game.code == code,
+                    or_(
+                        and_(models.Game.status == "finished", models.Game.updated_at < now - self.finished_ttl),
+                        models.Game.updated_at < now - self.recycle_after,
+                    ),
+                )
+                .values(code=None)
+                .execution_options(synchronize_session=False)
+            )
+            game = models.Game(code=code)
+            db.add(game)
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                with self._lock:
+                    self.collisions += 1
+                continue
+            with self._lock:
+                self.allocated += 1
+                self.recycled += released.rowcount
+            return game
+        raise RoomCodesExhausted(f"No free room code after {MAX_ATTEMPTS} attempts")
+
+    async def stats(self, db: AsyncSession) -> dict:
+        in_use = await db.scalar(select(func.count()).select_from(models.Game).where(models.Game.code.is_not(None)))
+        with self._lock:
+            return {
+                "pool_size": self.size,
+                "in_use": in_use,
+                "utilization": in_use / self.size,
+                "allocated": self.allocated,
+                "collisions": self.collisions,
+                "recycled": self.recycled,
+            }
+
+
+allocator = CodeAllocator(
+    settings.ROOM_CODE_ALPHABET,
+    settings.ROOM_CODE_LENGTH,
+    timedelta(hours=settings.ROOM_CODE_RECYCLE_HOURS),
+    timedelta(minutes=settings.GC_FINISHED_TTL_MINUTES),
+)
@@ -1,8 +1,91 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
-    OPENAI_API_KEY: str
+    # Override for the async engine when DATABASE_URL can't simply be switched
+    # to asyncpg (e.g. psycopg2-only query params such as sslmode)
+    ASYNC_DATABASE_URL: str = ""
+    # Read-only replica of DATABASE_URL for state reads (empty: read the
+    # primary). Reads fall back to the primary while the replica lags behind
+    # a write the reader must see
+    DATABASE_REPLICA_URL: str = ""
+    # Only needed when AI_PROVIDER is "openai"; "local" runs fully offline
+    OPENAI_API_KEY: str = ""
+    # Rooms whose rendered state is kept in memory for get_game_state
+    STATE_CACHE_MAX_ROOMS: int = 1024
+    # LLM backend for impostor answers ("openai" or "local") and its settings
+    AI_PROVIDER: str = "openai"
+    AI_MODEL: str = "gpt-4o-mini"
+    AI_TEMPERATURE: float = 0.9
+    # Completions cached by (question, normalized answers, model, temperature)
+    AI_CACHE_SIZE: int = 2048
+    AI_CACHE_TTL_SECONDS: float = 3600
+    # Background impostor generation: worker threads and per-call LLM timeout
+    AI_WORKERS: int = 8
+    AI_TIMEOUT_SECONDS: float = 15
+    # Provider calls go through a dispatcher: at most AI_MAX_CONCURRENCY run
+    # at once (impostor answers before drafts), calls are paced to
+    # AI_RATE_LIMIT_RPM (0 for no limit), and retryable errors are retried
+    # with jittered backoff until AI_DEADLINE_SECONDS after the request
+    AI_MAX_CONCURRENCY: int = 16
+    AI_RATE_LIMIT_RPM: float = 0
+    AI_MAX_RETRIES: int = 3
+    AI_RETRY_BASE_SECONDS: float = 0.5
+    AI_DEADLINE_SECONDS: float = 30
+    # Start generating the impostor answer once this fraction of players have
+    # answered (0 disables), and optionally redo it once everyone has
+    AI_SPECULATIVE_FRACTION: float = 0.0
+    AI_SPECULATIVE_REGENERATE: bool = False
+    # Draft an impostor answer for every round as soon as rounds are created:
+    # "off", "refine" (draft is reworked once answers are in) or "use" (as is).
+    # Drafts get their own few workers so they never queue ahead of impostor
+    # jobs on AI_WORKERS
+    AI_DRAFT_MODE: Literal["off", "refine", "use"] = "off"
+    AI_DRAFT_WORKERS: int = 2
+    # Room codes: alphabet and length of the pool (e.g. base36
+    # "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" for a bigger pool; at most 10
+    # characters), and how long an idle unfinished game holds on to its code
+    # (finished games keep theirs for GC_FINISHED_TTL_MINUTES)
+    ROOM_CODE_ALPHABET: str = "0123456789"
+    ROOM_CODE_LENGTH: int = 4
+    ROOM_CODE_RECYCLE_HOURS: float = 24
+    # Garbage collection of old games: finished games are kept this long for
+    # the final leaderboard, abandoned ones until they've been idle this long
+    GC_FINISHED_TTL_MINUTES: float = 60
+    GC_IDLE_TTL_HOURS: float = 24
+    GC_INTERVAL_SECONDS: float = 300
+    GC_BATCH_SIZE: int = 500
+    # "db" serves every request from the database; "memory" keeps games in
+    # progress in process memory, journaled to LIVE_JOURNAL_PATH and written
+    # to the database every LIVE_FLUSH_INTERVAL_SECONDS (one process, or
+    # several with SHARD_NODES)
+    GAME_ENGINE: str = "db"
+    LIVE_JOURNAL_PATH: str = "live-journal.jsonl"
+    LIVE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LIVE_IDLE_EVICT_MINUTES: float = 30
+    # Running several processes: EVENT_BUS shares room notifications between
+    # them ("inprocess" for one process, "postgres" LISTEN/NOTIFY, or "redis"
+    # with the redis package installed), and SHARD_NODES (comma-separated
+    # base URLs of every process, this one being SHARD_SELF) pins each room
+    # to one of them by consistent hashing
+    EVENT_BUS: str = "inprocess"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    SHARD_NODES: str = ""
+    SHARD_SELF: str = ""
+    # Logging: level, "json" lines or "text", and the fraction of high-volume
+    # debug/info records (prompts, per-call LLM timings) that are kept
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATE: float = 1.0
+    # Add a Server-Timing header (DB, pool wait, LLM, serialization) to responses
+    SERVER_TIMING: bool = False
+    # Signs the player tokens issued by join_game; must be the same on every
+    # process. Unset, a random per-process key is used (tokens die on restart)
+    PLAYER_TOKEN_SECRET: str = ""
+    # Token for the /admin endpoints (X-Admin-Token header); unset disables them
+    ADMIN_TOKEN: str = ""
 
     class Config:
         env_file = ".env"
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from .config import settings
@@ -12,5 +14,52 @@ engine = create_engine(
     max_overflow=20
 )
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+
+
+def async_database_url(url: str):
+    # Same database through an asyncio driver: asyncpg for Postgres, aiosqlite for SQLite
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+# Request handlers use the async engine; background jobs and scripts use the sync one
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# State reads go to the replica when one is configured; see replica.py
+replica_engine = create_async_engine(
+    async_database_url(settings.DATABASE_REPLICA_URL),
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+) if settings.DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = (
+    async_sessionmaker(bind=replica_engine, autoflush=False, expire_on_commit=False)
+    if replica_engine is not None else AsyncSessionLocal
+)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enable_sqlite_foreign_keys)
+
 Base = declarative_base()
 
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+
+class RoomBroker:
+    """
+    In-process pub/sub fan-out of "game changed" notifications per room code.
+    Subscribers are asyncio queues; publishers may be on any thread. With a
+    bus set (see bus.py), publishes also reach the brokers of other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, dict[asyncio.Queue, asyncio.AbstractEventLoop]] = {}
+        self._listeners = []
+        self.bus = None
+
+    def add_listener(self, callback):
+        # Called synchronously with the room code on every publish
+        self._listeners.append(callback)
+
+    def subscribe(self, code: str) -> asyncio.Queue:
+        # maxsize=1 coalesces bursts: a subscriber only needs to know that
+        # something changed since it last rendered the state.
+        queue = asyncio.Queue(maxsize=1)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(code, {})[queue] = loop
+        return queue
+
+    def unsubscribe(self, code: str, queue: asyncio.Queue):
+        with self._lock:
+            room = self._subscribers.get(code)
+            if room is None:
+                return
+            room.pop(queue, None)
+            if not room:
+                del self._subscribers[code]
+
+    def publish(self, code: str):
+        self.deliver(code)
+        if self.bus is not None:
+            self.bus.publish(code)
+
+    def deliver(self, code: str):
+        # Local fan-out only; the bus calls this for other processes' publishes
+        for callback in self._listeners:
+            callback(code)
+        with self._lock:
+            targets = list(self._subscribers.get(code, {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(_offer, queue)
+
+    def deliver_all(self):
+        # Something may have been missed (e.g. the bus reconnected): wake everyone
+        with self._lock:
+            codes = list(self._subscribers)
+        for code in codes:
+            self.deliver(code)
+
+    def subscriber_count(self, code: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(code, {}))
+
+
+def _offer(queue: asyncio.Queue):
+    if not queue.full():
+        queue.put_nowait(None)
+
+
+broker = RoomBroker()
@@ -1,7 +1,64 @@
 import random
+import uuid
+from collections import deque
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import case, insert, select, update
 from sqlalchemy.orm import Session
 from . import models
 
+# Scoring rules
+CORRECT_GUESS_POINTS = 500   # voter picked the AI answer
+STREAK_BONUS_POINTS = 50     # per consecutive correct guess after the first
+WRONG_GUESS_PENALTY = 250    # voter picked a human answer...
+FOOLED_PLAYER_POINTS = 250   # ...and that answer's author gets this
+
+
+def score_round(
+    votes: Iterable[tuple[UUID, UUID, Optional[UUID]]],
+    ai_answer_id: Optional[UUID],
+    players: dict[UUID, tuple[int, int]],
+) -> dict[UUID, tuple[int, int]]:
+    """
+    Applies a round's votes to the players' scores. votes holds
+    (voter_id, answer_id_voted_for, author_id of that answer or None for the
+    AI), players maps player_id -> (score, streak). Returns the new
+    (score, streak) of every player whose values changed. Pure, so it can be
+    tested and benchmarked without a database.
+    """
+    scores = dict(players)
+    for voter_id, answer_id, author_id in votes:
+        if voter_id not in scores:
+            continue
+        score, streak = scores[voter_id]
+        if answer_id == ai_answer_id:
+            # Correct: 500 base + (streak-1)*50 bonus
+            streak += 1
+            scores[voter_id] = (score + CORRECT_GUESS_POINTS + (streak - 1) * STREAK_BONUS_POINTS, streak)
+        else:
+            scores[voter_id] = (score - WRONG_GUESS_PENALTY, 0)
+            # Award the writer of the answer (if human)
+            if author_id in scores:
+                author_score, author_streak = scores[author_id]
+                scores[author_id] = (author_score + FOOLED_PLAYER_POINTS, author_streak)
+    return {pid: values for pid, values in scores.items() if values != players[pid]}
+
+
+def touch(game: models.Game):
+    # Bump the state version in SQL so concurrent writers can't lose an increment
+    game.state_version = models.Game.state_version + 1
+
+
+def touch_locked(game: models.Game) -> int:
+    """
+    touch() for a game whose row this transaction holds locked, so the new
+    version is known without reading it back: the floor a client's state
+    reads must reach to include this write.
+    """
+    version = game.state_version + 1
+    touch(game)
+    return version
+
 def create_rounds(db: Session, game: models.Game):
     # Fetch all questions for this game
     questions = db.query(models.Question).filter(models.Question.game_id == game.id).all()
@@ -86,9 +143,12 @@ def create_rounds(db: Session, game: models.Game):
     # Let's rewrite loop for that
     pass
 
-def create_rounds_safe(db: Session, game: models.Game):
-    questions = db.query(models.Question).filter(models.Question.game_id == game.id).all()
-    
+def interleave_questions(questions: list) -> list:
+    """
+    Orders questions for the rounds: each player's questions are shuffled and
+    then dealt out in a fixed, shuffled seat order, so no player gets two
+    questions in a row while others still have some.
+    """
     questions_by_player = {}
     for q in questions:
         if q.player_id not in questions_by_player:
@@ -99,33 +159,54 @@ def create_rounds_safe(db: Session, game: models.Game):
     random.shuffle(player_ids) # Randomize seat order
     
     # Shuffle questions for each player
+    queues = {}
     for pid in player_ids:
         random.shuffle(questions_by_player[pid])
+        queues[pid] = deque(questions_by_player[pid])
         
     ordered_questions = []
-    max_q = max(len(qs) for qs in questions_by_player.values()) if questions_by_player else 0
+    max_q = max(len(qs) for qs in queues.values()) if queues else 0
     
     for i in range(max_q):
         for pid in player_ids:
-            if questions_by_player[pid]:
-                ordered_questions.append(questions_by_player[pid].pop(0))
-                
+            if queues[pid]:
+                ordered_questions.append(queues[pid].popleft())
+    return ordered_questions
+
+
+def create_rounds_safe(db: Session, game: models.Game) -> list[tuple]:
+    """
+    Orders the game's questions into rounds and starts round 1. Returns
+    (round_id, question_text) for each round created. Round ids are made
+    here, so the rounds go in with one bulk insert and the questions are
+    linked to them with one UPDATE, whatever the number of rounds.
+    Commits, but leaves state_version to the caller, whose write this
+    completes and which has already bumped it.
+    """
+    questions = db.execute(
+        select(models.Question.id, models.Question.player_id, models.Question.text)
+        .where(models.Question.game_id == game.id)
+    ).all()
+    ordered_questions = interleave_questions(questions)
+
     # Create Rounds
-    for i, q in enumerate(ordered_questions):
-        new_round = models.Round(
-            game_id=game.id,
-            question_text=q.text,
-            round_index=i + 1
+    rounds = [
+        {"id": uuid.uuid4(), "game_id": game.id, "question_text": q.text, "round_index": i + 1}
+        for i, q in enumerate(ordered_questions)
+    ]
+    if rounds:
+        db.execute(insert(models.Round), rounds)
+        round_for_question = {q.id: r["id"] for q, r in zip(ordered_questions, rounds)}
+        db.execute(
+            update(models.Question)
+            .where(models.Question.id.in_(round_for_question))
+            .values(used_in_round_id=case(round_for_question, value=models.Question.id))
+            .execution_options(synchronize_session=False)
         )
-        db.add(new_round)
-        db.flush() # Populate new_round.id
-        
-        q.used_in_round_id = new_round.id
-        db.add(q)
-        
+
     # Update Game
     game.status = "answering"
     game.round_number = 1
     db.add(game)
     db.commit()
-
+    return [(r["id"], r["question_text"]) for r in rounds]
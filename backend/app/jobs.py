@@ -0,0 +1,170 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from uuid import UUID
+
+from . import models
+from .ai import FALLBACK_ANSWER, generate_draft_answer, generate_impostor_answer, speculative
+from .config import settings
+from .db import SessionLocal
+from .events import broker
+from .game_logic import touch_locked
+from .live import live
+from .log import fields
+from .replica import write_floors
+from .sharding import owns
+
+# LLM calls run here so submit_answer can return as soon as the answer is saved
+executor = ThreadPoolExecutor(max_workers=settings.AI_WORKERS, thread_name_prefix="ai-job")
+# Drafts for a whole game are submitted at once; kept apart so a room's
+# impostor job never waits behind another room's drafts
+draft_executor = ThreadPoolExecutor(max_workers=settings.AI_DRAFT_WORKERS, thread_name_prefix="ai-draft")
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_impostor_answer(code: str, round_id: UUID):
+    executor.submit(generate_round_impostor_answer, code, round_id)
+
+
+def generate_round_impostor_answer(code: str, round_id: UUID):
+    """
+    Generates the AI answer for a round whose game is in the "generating"
+    phase, stores it and moves the game to "voting". No DB connection is held
+    during the LLM call. Safe to run more than once for the same round.
+    """
+    live_game = live.get(code)
+    if live_game:
+        context = live.round_context(live_game, round_id)
+    else:
+        context = _load_round_context(round_id)
+    if context is None:
+        return
+    question_text, draft, answer_texts = context
+
+    logger.debug("generating impostor answer", extra=fields(
+        sampled=True, code=code, round_id=round_id, question=question_text, answers=answer_texts,
+    ))
+
+    try:
+        ai_text = None
+        if draft and settings.AI_DRAFT_MODE == "use":
+            ai_text = draft
+        if ai_text is None:
+            ai_text = speculative.take(round_id, len(answer_texts))
+        if ai_text is None:
+            refine = draft if settings.AI_DRAFT_MODE == "refine" else None
+            ai_text = generate_impostor_answer(question_text, answer_texts, refine)
+    except Exception:
+        logger.exception("AI job failed", extra=fields(code=code, round_id=round_id))
+        ai_text = FALLBACK_ANSWER
+
+    if live_game:
+        stored = live.add_ai_answer(live_game, round_id, ai_text)
+    else:
+        version = _store_ai_answer(round_id, ai_text)
+        stored = version is not None
+        if stored:
+            write_floors.note(code, version)
+    if stored:
+        broker.publish(code)
+
+
+def _load_round_context(round_id: UUID):
+    db = SessionLocal()
+    try:
+        current_round = db.get(models.Round, round_id)
+        if not current_round or current_round.ai_answer_id:
+            return None
+        answer_texts = [
+            a.text for a in db.query(models.Answer).filter(models.Answer.round_id == round_id).all()
+        ]
+        return current_round.question_text, current_round.ai_draft_answer, answer_texts
+    finally:
+        db.close()
+
+
+def _store_ai_answer(round_id: UUID, ai_text: str) -> Optional[int]:
+    # The game's new state_version, or None if the answer wasn't needed
+    db = SessionLocal()
+    try:
+        game = (
+            db.query(models.Game)
+            .join(models.Round, models.Round.game_id == models.Game.id)
+            .filter(models.Round.id == round_id)
+            .with_for_update(of=models.Game)
+            .first()
+        )
+        # Checked under the game row lock so a duplicate job can't add a second answer
+        current_round = db.get(models.Round, round_id)
+        if not game or game.status != "generating" or current_round.ai_answer_id:
+            return None
+
+        ai_answer = models.Answer(
+            round_id=current_round.id,
+            player_id=None, # AI
+            text=ai_text.lower()
+        )
+        db.add(ai_answer)
+
+        # Update Round with the AI answer ID
+        db.flush() # Get ID
+        current_round.ai_answer_id = ai_answer.id
+
+        # Transition to voting
+        game.status = "voting"
+        version = touch_locked(game)
+        db.commit()
+        return version
+    finally:
+        db.close()
+
+
+def schedule_round_drafts(code: str, rounds: list[tuple]):
+    # One job per round so drafts for the whole game are generated concurrently
+    for round_id, question_text in rounds:
+        draft_executor.submit(generate_round_draft, code, round_id, question_text)
+
+
+def generate_round_draft(code: str, round_id: UUID, question_text: str):
+    ai_text, _ = generate_draft_answer(question_text)
+    if ai_text == FALLBACK_ANSWER:
+        return
+
+    live_game = live.get(code)
+    if live_game:
+        live.set_draft(live_game, round_id, ai_text.lower())
+        return
+
+    db = SessionLocal()
+    try:
+        # Too late to be useful once the round's real AI answer exists
+        db.query(models.Round).filter(
+            models.Round.id == round_id,
+            models.Round.ai_answer_id.is_(None),
+        ).update({models.Round.ai_draft_answer: ai_text.lower()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def resume_pending_jobs():
+    # Games left in "generating" by a restart would otherwise never reach voting
+    db = SessionLocal()
+    try:
+        pending = (
+            db.query(models.Game.code, models.Round.id)
+            .join(models.Round, models.Round.game_id == models.Game.id)
+            .filter(
+                models.Game.status == "generating",
+                models.Round.round_index == models.Game.round_number,
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+    for code, round_id in pending:
+        # Each node resumes the rooms it owns
+        if owns(code):
+            schedule_impostor_answer(code, round_id)
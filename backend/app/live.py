@@ -0,0 +1,672 @@
+import glob
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.types import TIMESTAMP
+
+from . import models, schemas
+from .config import settings
+from .db import SessionLocal
+from .game_logic import interleave_questions, score_round
+from .log import fields
+from .sharding import owns
+
+logger = logging.getLogger(__name__)
+
+# Tables in the order rows are written, so foreign keys are always satisfied
+FLUSH_ORDER = ["games", "players", "rounds", "questions", "answers", "votes"]
+TABLES = {model.__tablename__: model.__table__ for model in
+          (models.Game, models.Player, models.Round, models.Question, models.Answer, models.Vote)}
+
+
+class _Slots:
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+
+class LivePlayer(_Slots):
+    __slots__ = ("id", "name", "score", "streak")
+    table = "players"
+
+    def row(self, game):
+        return {"id": self.id, "game_id": game.id, "name": self.name, "score": self.score, "streak": self.streak}
+
+
+class LiveQuestion(_Slots):
+    __slots__ = ("id", "player_id", "text", "idempotency_key", "used_in_round_id")
+    table = "questions"
+
+    def row(self, game):
+        return {"id": self.id, "game_id": game.id, "player_id": self.player_id, "text": self.text,
+                "idempotency_key": self.idempotency_key, "used_in_round_id": self.used_in_round_id}
+
+
+class LiveAnswer(_Slots):
+    __slots__ = ("id", "round_id", "player_id", "text", "idempotency_key")
+    table = "answers"
+
+    def row(self, game):
+        return {"id": self.id, "round_id": self.round_id, "player_id": self.player_id, "text": self.text,
+                "idempotency_key": self.idempotency_key}
+
+
+class LiveVote(_Slots):
+    __slots__ = ("id", "round_id", "voter_player_id", "answer_id_voted_for", "idempotency_key")
+    table = "votes"
+
+    def row(self, game):
+        return {"id": self.id, "round_id": self.round_id, "voter_player_id": self.voter_player_id,
+                "answer_id_voted_for": self.answer_id_voted_for, "idempotency_key": self.idempotency_key}
+
+
+class LiveRound(_Slots):
+    __slots__ = ("id", "round_index", "question_text", "ai_answer_id", "ai_draft_answer", "answers", "votes")
+    table = "rounds"
+
+    def row(self, game):
+        return {"id": self.id, "game_id": game.id, "round_index": self.round_index,
+                "question_text": self.question_text, "ai_answer_id": self.ai_answer_id,
+                "ai_draft_answer": self.ai_draft_answer,
+                "answer_count": sum(1 for a in self.answers if a.player_id is not None),
+                "vote_count": len(self.votes)}
+
+
+class LiveGame(_Slots):
+    __slots__ = ("id", "code", "status", "round_number", "questions_per_player", "state_version",
+                 "players", "questions", "rounds", "lock", "touched_at", "evicted")
+    table = "games"
+
+    def row(self, game=None):
+        # code is left out: it's assigned when the row is created and may
+        # since have been released for reuse
+        return {"id": self.id, "status": self.status, "round_number": self.round_number,
+                "questions_per_player": self.questions_per_player, "state_version": self.state_version,
+                "player_count": len(self.players), "question_count": len(self.questions),
+                "updated_at": datetime.now(timezone.utc)}
+
+    def current_round(self) -> Optional[LiveRound]:
+        if 1 <= self.round_number <= len(self.rounds):
+            return self.rounds[self.round_number - 1]
+        return None
+
+
+class Journal:
+    """
+    Append-only JSONL file of the rows each mutation changed. Rotated on
+    every flush; a rotated file is deleted once its rows are in the database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+
+    def rotate(self) -> Optional[str]:
+        with self._lock:
+            if self._file.tell() == 0:
+                return None
+            os.fsync(self._file.fileno())
+            self._file.close()
+            rotated = f"{self.path}.{time.time_ns()}"
+            os.replace(self.path, rotated)
+            self.open()
+            return rotated
+
+    def files(self) -> list[str]:
+        # Oldest first: rotated files by timestamp suffix, then the live file
+        rotated = sorted(glob.glob(f"{glob.escape(self.path)}.*"), key=lambda f: int(f.rsplit(".", 1)[1]))
+        return rotated + ([self.path] if os.path.exists(self.path) else [])
+
+    def size(self) -> int:
+        return sum(os.path.getsize(f) for f in self.files())
+
+
+def _decode(table: str, row: dict) -> dict:
+    columns = TABLES[table].c
+    decoded = {}
+    for key, value in row.items():
+        if value is not None and isinstance(columns[key].type, UUID):
+            value = uuid.UUID(value)
+        elif value is not None and isinstance(columns[key].type, TIMESTAMP):
+            value = datetime.fromisoformat(value)
+        decoded[key] = value
+    return decoded
+
+
+class LiveGames:
+    """
+    In-memory engine for games in progress (GAME_ENGINE=memory). Every
+    read and write for a loaded room is served from compact per-room
+    structures; each change is appended to a local journal and written
+    behind to the models tables in batches every LIVE_FLUSH_INTERVAL_SECONDS
+    and as soon as a game finishes. Finished and idle games are unloaded once
+    flushed, after which the database routes serve them.
+
+    Every request for a room must reach the same process, so this needs a
+    single worker or SHARD_NODES (see sharding.py). Mutations take the room's
+    lock and write the journal, so the async routes call them through
+    asyncio.to_thread.
+    """
+
+    def __init__(self, journal_path: str, flush_interval: float, idle_evict: timedelta):
+        self.journal = Journal(journal_path)
+        self.flush_interval = flush_interval
+        self.idle_evict = idle_evict
+        self._games: dict[str, LiveGame] = {}
+        self._games_lock = threading.Lock()
+        # (table, row id) -> (game_id, row); later changes to a row replace earlier ones
+        self._pending: dict[tuple, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._deleted: set[uuid.UUID] = set()
+        self._unflushed_files: list[str] = []
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.last_flush_seconds = None
+        self.evictions = 0
+
+    # Lifecycle
+
+    def open(self):
+        """Recovers from the journal, loads active games and starts the flusher."""
+        self.recover()
+        self.journal.open()
+        self._thread = threading.Thread(target=self._run, name="live-flush", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+    def recover(self):
+        """
+        Writes rows left in the journal by a previous run to the database,
+        then loads every game that is still in progress.
+        """
+        pending, deleted = {}, set()
+        files = self.journal.files()
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from a crash
+                    if "deleted" in record:
+                        game_id = uuid.UUID(record["deleted"])
+                        deleted.add(game_id)
+                        pending = {k: v for k, v in pending.items() if v[0] != game_id}
+                        continue
+                    game_id = uuid.UUID(record["game_id"])
+                    for table, row in record["rows"]:
+                        row = _decode(table, row)
+                        pending[(table, row["id"])] = (game_id, row)
+        if pending or deleted:
+            self._write(pending, deleted)
+            logger.info("Live engine recovered journal", extra=fields(rows=len(pending), files=len(files)))
+        for path in files:
+            os.remove(path)
+        self._load_active()
+
+    def _load_active(self):
+        cutoff = datetime.now(timezone.utc) - self.idle_evict
+        db = SessionLocal()
+        try:
+            games = db.query(models.Game).filter(
+                models.Game.status != "finished",
+                models.Game.code.is_not(None),
+                models.Game.updated_at >= cutoff,
+            ).all()
+            # With sharding, other nodes load their own rooms
+            games = [g for g in games if owns(g.code)]
+            if not games:
+                return
+            game_ids = [g.id for g in games]
+            players = db.query(models.Player).filter(models.Player.game_id.in_(game_ids)).all()
+            questions = db.query(models.Question).filter(models.Question.game_id.in_(game_ids)).all()
+            rounds = db.query(models.Round).filter(models.Round.game_id.in_(game_ids)).order_by(
+                models.Round.game_id, models.Round.round_index).all()
+            round_ids = [r.id for r in rounds]
+            answers = db.query(models.Answer).filter(models.Answer.round_id.in_(round_ids)).all()
+            votes = db.query(models.Vote).filter(models.Vote.round_id.in_(round_ids)).all()
+        finally:
+            db.close()
+
+        live_rounds = {}
+        by_game = {}
+        for g in games:
+            by_game[g.id] = self._new_game(g)
+        for p in players:
+            by_game[p.game_id].players[p.id] = LivePlayer(id=p.id, name=p.name, score=p.score, streak=p.streak)
+        for q in questions:
+            by_game[q.game_id].questions.append(LiveQuestion(
+                id=q.id, player_id=q.player_id, text=q.text,
+                idempotency_key=q.idempotency_key, used_in_round_id=q.used_in_round_id))
+        for r in rounds:
+            live_round = LiveRound(id=r.id, round_index=r.round_index, question_text=r.question_text,
+                                   ai_answer_id=r.ai_answer_id, ai_draft_answer=r.ai_draft_answer,
+                                   answers=[], votes=[])
+            live_rounds[r.id] = live_round
+            by_game[r.game_id].rounds.append(live_round)
+        for a in answers:
+            live_rounds[a.round_id].answers.append(LiveAnswer(
+                id=a.id, round_id=a.round_id, player_id=a.player_id, text=a.text,
+                idempotency_key=a.idempotency_key))
+        for v in votes:
+            live_rounds[v.round_id].votes.append(LiveVote(
+                id=v.id, round_id=v.round_id, voter_player_id=v.voter_player_id,
+                answer_id_voted_for=v.answer_id_voted_for, idempotency_key=v.idempotency_key))
+        with self._games_lock:
+            for game in by_game.values():
+                self._games[game.code] = game
+        logger.info("Live engine loaded active games", extra=fields(games=len(by_game)))
+
+    # Rooms
+
+    @staticmethod
+    def _new_game(game: models.Game) -> LiveGame:
+        return LiveGame(
+            id=game.id, code=game.code, status=game.status, round_number=game.round_number,
+            questions_per_player=game.questions_per_player, state_version=game.state_version,
+            players={}, questions=[], rounds=[], lock=threading.Lock(),
+            touched_at=time.monotonic(), evicted=False,
+        )
+
+    def get(self, code: str) -> Optional[LiveGame]:
+        return self._games.get(code)
+
+    def add(self, game: models.Game) -> LiveGame:
+        # The row itself was inserted by the code allocator
+        live_game = self._new_game(game)
+        with self._games_lock:
+            self._games[game.code] = live_game
+        return live_game
+
+    def remove(self, code: str):
+        """Unloads a deleted room and drops its unwritten rows."""
+        with self._flush_lock:
+            with self._games_lock:
+                game = self._games.pop(code, None)
+            if game is None:
+                return
+            with game.lock:
+                game.evicted = True
+                with self._pending_lock:
+                    self._pending = {k: v for k, v in self._pending.items() if v[0] != game.id}
+                    self._deleted.add(game.id)
+                    self.journal.append({"deleted": str(game.id)})
+
+    def _check(self, game: LiveGame):
+        if game.evicted:
+            # Unloaded between the lookup and the lock; the database has it now
+            raise HTTPException(status_code=409, detail="Game was just unloaded, please retry")
+
+    def _changed(self, game: LiveGame, *objects):
+        # Called with game.lock held
+        game.state_version += 1
+        game.touched_at = time.monotonic()
+        rows = [(game.table, game.row())] + [(o.table, o.row(game)) for o in objects]
+        with self._pending_lock:
+            self.journal.append({"game_id": str(game.id), "rows": rows})
+            for table, row in rows:
+                self._pending[(table, row["id"])] = (game.id, row)
+        if game.status == "finished":
+            self._wake.set()
+
+    # Routes
+
+    def join(self, game: LiveGame, name: str, rejoining: Optional[uuid.UUID] = None) -> LivePlayer:
+        # rejoining: the player id the caller's token proves, as in join_game
+        with game.lock:
+            self._check(game)
+            for player in game.players.values():
+                if player.name == name:
+                    if player.id != rejoining:
+                        raise HTTPException(status_code=409, detail="Name already taken in this game")
+                    return player  # Rejoin
+            if game.status != "lobby":
+                raise HTTPException(status_code=400, detail="Game already started")
+            player = LivePlayer(id=uuid.uuid4(), name=name, score=0, streak=0)
+            game.players[player.id] = player
+            self._changed(game, player)
+            return player
+
+    def start(self, game: LiveGame):
+        with game.lock:
+            self._check(game)
+            if len(game.players) < 2:
+                raise HTTPException(status_code=400, detail="Need at least 2 players to start")
+            game.status = "setup_questions"
+            game.round_number = 0
+            self._changed(game)
+
+    def set_question_count(self, game: LiveGame, count: int):
+        with game.lock:
+            self._check(game)
+            game.questions_per_player = count
+            game.status = "write_questions"
+            self._changed(game)
+
+    def _player(self, game: LiveGame, player_id: uuid.UUID) -> LivePlayer:
+        player = game.players.get(player_id)
+        if player is None:
+            raise HTTPException(status_code=404, detail="Player not found")
+        return player
+
+    def submit_question(self, game: LiveGame, player_id: uuid.UUID, text: str,
+                        idempotency_key: Optional[str]) -> list[tuple]:
+        """Returns (round_id, question_text) for each round created, if this was the last question."""
+        with game.lock:
+            self._check(game)
+            if idempotency_key and any(
+                q.idempotency_key == idempotency_key and q.player_id == player_id for q in game.questions
+            ):
+                return []
+            if game.status != "write_questions":
+                raise HTTPException(status_code=400, detail="Not in question writing phase")
+            self._player(game, player_id)
+            if sum(1 for q in game.questions if q.player_id == player_id) >= game.questions_per_player:
+                raise HTTPException(status_code=400, detail="Max questions reached for this player")
+
+            question = LiveQuestion(id=uuid.uuid4(), player_id=player_id, text=text,
+                                    idempotency_key=idempotency_key)
+            game.questions.append(question)
+            if len(game.questions) < len(game.players) * game.questions_per_player:
+                self._changed(game, question)
+                return []
+
+            # All questions submitted! Advance to first round
+            for i, q in enumerate(interleave_questions(game.questions)):
+                new_round = LiveRound(id=uuid.uuid4(), round_index=i + 1, question_text=q.text,
+                                      answers=[], votes=[])
+                q.used_in_round_id = new_round.id
+                game.rounds.append(new_round)
+            game.status = "answering"
+            game.round_number = 1
+            self._changed(game, *game.rounds, *game.questions)
+            return [(r.id, r.question_text) for r in game.rounds]
+
+    def submit_answer(self, game: LiveGame, player_id: uuid.UUID, text: str,
+                      idempotency_key: Optional[str]) -> Optional[tuple]:
+        """
+        Returns (round_id, question_text, answer_texts, all_answered) for a new
+        answer, or None for a replayed one.
+        """
+        with game.lock:
+            self._check(game)
+            if idempotency_key and any(
+                a.idempotency_key == idempotency_key and a.player_id == player_id
+                for r in game.rounds for a in r.answers
+            ):
+                return None
+            if game.status != "answering":
+                raise HTTPException(status_code=400, detail="Not in answering phase")
+            current_round = game.current_round()
+            if not current_round:
+                raise HTTPException(status_code=500, detail="Current round not found")
+            self._player(game, player_id)
+            if any(a.player_id == player_id for a in current_round.answers):
+                raise HTTPException(status_code=400, detail="Already answered this round")
+
+            answer = LiveAnswer(id=uuid.uuid4(), round_id=current_round.id, player_id=player_id,
+                                text=text.lower(), idempotency_key=idempotency_key)
+            current_round.answers.append(answer)
+            all_answered = len(current_round.answers) >= len(game.players)
+            if all_answered:
+                game.status = "generating"
+            self._changed(game, answer, current_round)
+            return (current_round.id, current_round.question_text,
+                    [a.text for a in current_round.answers], all_answered)
+
+    def submit_vote(self, game: LiveGame, player_id: uuid.UUID, answer_id: uuid.UUID,
+                    idempotency_key: Optional[str]):
+        with game.lock:
+            self._check(game)
+            if idempotency_key and any(
+                v.idempotency_key == idempotency_key and v.voter_player_id == player_id
+                for r in game.rounds for v in r.votes
+            ):
+                return
+            if game.status != "voting":
+                raise HTTPException(status_code=400, detail="Not in voting phase")
+            current_round = game.current_round()
+            self._player(game, player_id)
+            answers = {a.id: a for a in current_round.answers}
+            if answer_id not in answers:
+                raise HTTPException(status_code=400, detail="Answer not found in this round")
+            if answers[answer_id].player_id == player_id:
+                raise HTTPException(status_code=400, detail="You cannot vote for your own answer")
+            if any(v.voter_player_id == player_id for v in current_round.votes):
+                raise HTTPException(status_code=400, detail="Already voted")
+
+            vote = LiveVote(id=uuid.uuid4(), round_id=current_round.id, voter_player_id=player_id,
+                            answer_id_voted_for=answer_id, idempotency_key=idempotency_key)
+            current_round.votes.append(vote)
+            changed = []
+            if len(current_round.votes) >= len(game.players):
+                # Reveal phase
+                game.status = "reveal"
+                new_scores = score_round(
+                    [(v.voter_player_id, v.answer_id_voted_for, answers[v.answer_id_voted_for].player_id)
+                     for v in current_round.votes],
+                    current_round.ai_answer_id,
+                    {pid: (p.score, p.streak) for pid, p in game.players.items()},
+                )
+                for pid, (score, streak) in new_scores.items():
+                    game.players[pid].score = score
+                    game.players[pid].streak = streak
+                    changed.append(game.players[pid])
+            self._changed(game, vote, current_round, *changed)
+
+    def next_round(self, game: LiveGame) -> str:
+        with game.lock:
+            self._check(game)
+            if game.status == "reveal":
+                has_next = game.round_number < len(game.rounds)
+                game.status = "leaderboard" if has_next else "finished"
+                self._changed(game)
+            elif game.status == "leaderboard":
+                game.round_number += 1
+                game.status = "answering"
+                self._changed(game)
+            return game.status
+
+    # AI jobs
+
+    def round_context(self, game: LiveGame, round_id: uuid.UUID) -> Optional[tuple]:
+        """(question_text, draft, answer_texts) for a round still waiting on its AI answer."""
+        with game.lock:
+            for r in game.rounds:
+                if r.id == round_id and not r.ai_answer_id:
+                    return r.question_text, r.ai_draft_answer, [a.text for a in r.answers]
+            return None
+
+    def add_ai_answer(self, game: LiveGame, round_id: uuid.UUID, text: str) -> bool:
+        """Stores the AI answer and moves the game to voting. False if that already happened."""
+        with game.lock:
+            current_round = game.current_round()
+            if (game.evicted or game.status != "generating" or not current_round
+                    or current_round.id != round_id or current_round.ai_answer_id):
+                return False
+            ai_answer = LiveAnswer(id=uuid.uuid4(), round_id=round_id, player_id=None, text=text.lower())
+            current_round.answers.append(ai_answer)
+            current_round.ai_answer_id = ai_answer.id
+            game.status = "voting"
+            self._changed(game, ai_answer, current_round)
+            return True
+
+    def set_draft(self, game: LiveGame, round_id: uuid.UUID, text: str):
+        # Not a visible change, so the state version is left alone
+        with game.lock:
+            for r in game.rounds:
+                if r.id == round_id and not r.ai_answer_id and not game.evicted:
+                    r.ai_draft_answer = text
+                    with self._pending_lock:
+                        row = r.row(game)
+                        self.journal.append({"game_id": str(game.id), "rows": [(r.table, row)]})
+                        self._pending[(r.table, r.id)] = (game.id, row)
+
+    # Reads
+
+    def state(self, game: LiveGame) -> tuple[uuid.UUID, int, schemas.GameState]:
+        with game.lock:
+            current_round = game.current_round()
+            answers, votes = [], []
+            if current_round:
+                answers = list(current_round.answers)
+                # Same seeded order as the database path
+                random.Random(str(current_round.id)).shuffle(answers)
+                votes = list(current_round.votes)
+            return game.id, game.state_version, schemas.GameState(
+                game_id=game.id,
+                code=game.code,
+                status=game.status,
+                round_number=game.round_number,
+                questions_per_player=game.questions_per_player,
+                players=list(game.players.values()),
+                current_round_id=current_round.id if current_round else None,
+                question_text=current_round.question_text if current_round else None,
+                answers=answers,
+                votes=votes,
+                state_version=game.state_version,
+            )
+
+    def version(self, game: LiveGame) -> tuple[uuid.UUID, int]:
+        return game.id, game.state_version
+
+    # Write-behind
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self._evict()
+            except Exception:
+                logger.exception("Live engine flush error")
+
+    def flush(self):
+        """Writes every pending row to the database in one transaction."""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                deleted, self._deleted = self._deleted, set()
+                rotated = self.journal.rotate()
+                if rotated:
+                    self._unflushed_files.append(rotated)
+            if not pending and not deleted:
+                return
+            start = time.perf_counter()
+            try:
+                self._write(pending, deleted)
+            except Exception:
+                # Keep the rows (newer versions win) and the journal files for the next attempt
+                with self._pending_lock:
+                    for key, value in pending.items():
+                        self._pending.setdefault(key, value)
+                    self._deleted |= deleted
+                raise
+            for path in self._unflushed_files:
+                os.remove(path)
+            self._unflushed_files = []
+            self.flushes += 1
+            self.flushed_rows += len(pending)
+            self.last_flush_seconds = round(time.perf_counter() - start, 4)
+
+    @staticmethod
+    def _write(pending: dict, deleted: set):
+        by_table = {table: [] for table in FLUSH_ORDER}
+        for (table, _), (game_id, row) in pending.items():
+            if game_id not in deleted:
+                by_table[table].append(row)
+
+        db = SessionLocal()
+        try:
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            ai_answers = []
+            for table in FLUSH_ORDER:
+                rows = by_table[table]
+                if not rows:
+                    continue
+                if table == "rounds":
+                    # ai_answer_id points at an answer written after the rounds
+                    ai_answers = [{"id": r["id"], "ai_answer_id": r["ai_answer_id"]} for r in rows if r["ai_answer_id"]]
+                    rows = [{k: v for k, v in r.items() if k != "ai_answer_id"} for r in rows]
+                stmt = insert(TABLES[table])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={key: stmt.excluded[key] for key in rows[0] if key != "id"},
+                )
+                db.execute(stmt, rows)
+            if ai_answers:
+                db.execute(update(models.Round), ai_answers)
+            if deleted:
+                db.execute(delete(models.Game).where(models.Game.id.in_(deleted)))
+            db.commit()
+        finally:
+            db.close()
+
+    def _evict(self):
+        # Finished and idle games go back to being served from the database
+        idle_before = time.monotonic() - self.idle_evict.total_seconds()
+        with self._games_lock:
+            candidates = [g for g in self._games.values() if g.status == "finished" or g.touched_at < idle_before]
+        for game in candidates:
+            with game.lock:
+                with self._pending_lock:
+                    if any(game_id == game.id for game_id, _ in self._pending.values()):
+                        continue
+                game.evicted = True
+                with self._games_lock:
+                    self._games.pop(game.code, None)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "enabled": self._thread is not None,
+            "games": len(self._games),
+            "pending_rows": pending,
+            "journal_bytes": self.journal.size(),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "last_flush_seconds": self.last_flush_seconds,
+            "evictions": self.evictions,
+        }
+
+
+live = LiveGames(
+    settings.LIVE_JOURNAL_PATH,
+    settings.LIVE_FLUSH_INTERVAL_SECONDS,
+    timedelta(minutes=settings.LIVE_IDLE_EVICT_MINUTES),
+)
@@ -0,0 +1,362 @@
+import hashlib
+import itertools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+
+from . import metrics
+from .config import settings
+from .log import fields
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRequest(NamedTuple):
+    kind: str  # "impostor" or "draft"
+    question: str
+    player_answers: tuple[str, ...]
+    prompt: str
+    draft: Optional[str] = None
+
+
+class Completion(NamedTuple):
+    text: str
+    tokens: int
+
+
+class OpenAIProvider:
+    """Sends the rendered prompt to the OpenAI chat completions API."""
+
+    def __init__(self, api_key: str, model: str, temperature: float):
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY is required when AI_PROVIDER is 'openai'")
+        from openai import OpenAI
+
+        # Retries are the dispatcher's, so they share its rate limit and deadline
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self.model = model
+        self.temperature = temperature
+
+    def complete(self, request: LLMRequest) -> Completion:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a player in a casual party game trying to blend in."},
+                {"role": "user", "content": request.prompt}
+            ],
+            max_tokens=150,
+            temperature=self.temperature,
+            timeout=settings.AI_TIMEOUT_SECONDS,
+        )
+        tokens = response.usage.total_tokens if response.usage else 0
+        if response.usage:
+            logger.debug("openai usage", extra=fields(
+                sampled=True, kind=request.kind, response_id=response.id,
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+                finish_reason=response.choices[0].finish_reason,
+            ))
+        return Completion(response.choices[0].message.content.strip(), tokens)
+
+    def retryable(self, error: Exception) -> bool:
+        import openai
+
+        return isinstance(error, (
+            openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError,
+        ))
+
+
+class LocalProvider:
+    """
+    Offline, deterministic stand-in for load tests and CI. Mimics one of the
+    player answers: same length and trailing punctuation, with words walked
+    from a bigram chain over all of the answers. The same inputs always give
+    the same answer and no tokens are spent.
+    """
+
+    model = "local-mimic"
+    temperature = 0.0
+
+    DRAFT_TEMPLATES = ["honestly {}", "{} for sure", "idk probably {}", "definitely {}", "{} obviously"]
+
+    def complete(self, request: LLMRequest) -> Completion:
+        rng = random.Random("\x00".join((request.question,) + request.player_answers))
+        if not request.player_answers:
+            words = [w for w in _words(request.question) if len(w) > 3] or ["that"]
+            return Completion(rng.choice(self.DRAFT_TEMPLATES).format(rng.choice(words)), 0)
+
+        voice = rng.choice(request.player_answers)
+        length = max(1, len(_words(voice)))
+        chain: dict[str, list[str]] = {}
+        vocab = []
+        for answer in request.player_answers:
+            words = _words(answer)
+            vocab.extend(words)
+            for a, b in zip(words, words[1:]):
+                chain.setdefault(a, []).append(b)
+        if not vocab:
+            return Completion(voice, 0)
+
+        out = [rng.choice(vocab)]
+        while len(out) < length:
+            out.append(rng.choice(chain.get(out[-1]) or vocab))
+        text = " ".join(out)
+        if text in request.player_answers:
+            text += " lol"
+        punctuation = re.search(r"[.!?]+$", voice.strip())
+        return Completion(text + (punctuation.group() if punctuation else ""), 0)
+
+    def retryable(self, error: Exception) -> bool:
+        return False
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+class ResponseCache:
+    """
+    Content-addressed LRU cache of completions with a TTL. The key covers the
+    question, the normalized (order-insensitive) player answers, the draft and
+    the model settings, so retries and replays don't pay for a second call.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Completion]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(request: LLMRequest, model: str, temperature: float) -> str:
+        answers = sorted(" ".join(a.lower().split()) for a in request.player_answers)
+        raw = json.dumps([request.kind, request.question.strip(), answers, request.draft, model, temperature])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Completion]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, completion: Completion):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, completion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class TokenBucket:
+    """Allows rate_per_second calls on average, in bursts of up to capacity."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def acquire(self, deadline: float) -> float:
+        """
+        Takes a token, sleeping until one is available. Returns the seconds
+        waited, or raises TimeoutError if that would run past the deadline.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            if now + delay > deadline:
+                raise TimeoutError("LLM rate limit wait would exceed the deadline")
+            time.sleep(delay)
+            waited += delay
+
+
+class Dispatcher:
+    """
+    Sits between complete() and the provider. AI_MAX_CONCURRENCY worker
+    threads take requests off a priority queue: impostor answers, which a room
+    is waiting on, always before drafts, and otherwise in arrival order. Each
+    call first takes a token from the AI_RATE_LIMIT_RPM bucket. Identical
+    requests in flight share one call. Retryable errors are retried with
+    jittered exponential backoff (or the provider's Retry-After) while the
+    request's AI_DEADLINE_SECONDS allows.
+    """
+
+    PRIORITY = {"impostor": 0, "draft": 1}
+
+    def __init__(self, provider, concurrency: int, bucket: Optional[TokenBucket],
+                 max_retries: int, retry_base: float):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._arrivals = itertools.count()
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._workers: list[threading.Thread] = []
+        self.calls = 0
+        self.largest_queue = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.deadline_exceeded = 0
+
+    def complete(self, request: LLMRequest, key: str) -> Completion:
+        deadline = time.monotonic() + settings.AI_DEADLINE_SECONDS
+        return self.submit(request, key, deadline).result(timeout=settings.AI_DEADLINE_SECONDS)
+
+    def submit(self, request: LLMRequest, key: str, deadline: float) -> Future:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._in_flight[key] = Future()
+            if not self._workers:
+                for i in range(self.concurrency):
+                    worker = threading.Thread(target=self._run, name=f"llm-{i}", daemon=True)
+                    worker.start()
+                    self._workers.append(worker)
+            # The arrival counter breaks ties, so requests themselves are never compared
+            priority = self.PRIORITY.get(request.kind, len(self.PRIORITY))
+            self._queue.put((priority, next(self._arrivals), request, key, future, deadline))
+            self.largest_queue = max(self.largest_queue, self._queue.qsize())
+        return future
+
+    def _run(self):
+        while True:
+            _, _, *item = self._queue.get()
+            with self._lock:
+                self.calls += 1
+            self._call(*item)
+
+    def _call(self, request: LLMRequest, key: str, future: Future, deadline: float):
+        try:
+            future.set_result(self._call_with_retries(request, deadline))
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                with self._lock:
+                    self.deadline_exceeded += 1
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _call_with_retries(self, request: LLMRequest, deadline: float) -> Completion:
+        attempt = 0
+        while True:
+            if time.monotonic() > deadline:
+                raise TimeoutError("LLM request expired in the queue")
+            if self.bucket:
+                waited = self.bucket.acquire(deadline)
+                with self._lock:
+                    self.throttled_seconds += waited
+            try:
+                return self.provider.complete(request)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.provider.retryable(e):
+                    raise
+                delay = max(random.uniform(0, self.retry_base * 2 ** attempt), _retry_after(e))
+                if time.monotonic() + delay > deadline:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                logger.info("llm retry", extra=fields(kind=request.kind, attempt=attempt,
+                                                      delay_ms=round(delay * 1000), error=str(e)))
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "calls": self.calls,
+                "largest_queue": self.largest_queue,
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "deadline_exceeded": self.deadline_exceeded,
+            }
+
+
+def _retry_after(error: Exception) -> float:
+    # Rate limit responses usually say how long to wait
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build_provider():
+    if settings.AI_PROVIDER == "openai":
+        return OpenAIProvider(settings.OPENAI_API_KEY, settings.AI_MODEL, settings.AI_TEMPERATURE)
+    if settings.AI_PROVIDER == "local":
+        return LocalProvider()
+    raise ValueError(f"Unknown AI_PROVIDER {settings.AI_PROVIDER!r}, expected 'openai' or 'local'")
+
+
+provider = build_provider()
+response_cache = ResponseCache(settings.AI_CACHE_SIZE, settings.AI_CACHE_TTL_SECONDS)
+dispatcher = Dispatcher(
+    provider,
+    concurrency=settings.AI_MAX_CONCURRENCY,
+    bucket=TokenBucket(settings.AI_RATE_LIMIT_RPM / 60, settings.AI_MAX_CONCURRENCY)
+    if settings.AI_RATE_LIMIT_RPM else None,
+    max_retries=settings.AI_MAX_RETRIES,
+    retry_base=settings.AI_RETRY_BASE_SECONDS,
+)
+
+
+def complete(request: LLMRequest) -> Completion:
+    """
+    Runs the request on the configured provider through the response cache.
+    A cached completion reports 0 tokens since nothing was spent on it.
+    """
+    key = ResponseCache.key(request, provider.model, provider.temperature)
+    cached = response_cache.get(key)
+    if cached is not None:
+        logger.debug("llm cache hit", extra=fields(sampled=True, kind=request.kind))
+        return Completion(cached.text, 0)
+    start = time.perf_counter()
+    try:
+        completion = dispatcher.complete(request, key)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe_llm_call(request.kind, elapsed)
+    logger.info("llm completion", extra=fields(
+        sampled=True, kind=request.kind, model=provider.model,
+        latency_ms=round(elapsed * 1000, 1), tokens=completion.tokens,
+    ))
+    response_cache.put(key, completion)
+    return completion
@@ -0,0 +1,130 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .config import settings
+
+# Records waiting for the writer thread; past this, new records are dropped
+# rather than making the caller wait on stdout
+QUEUE_SIZE = 10000
+# LogRecord attributes that aren't structured fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+
+def fields(sampled: bool = False, **values) -> dict:
+    """
+    extra= for a structured log call. sampled=True marks a high-volume record
+    that is kept with probability LOG_SAMPLE_RATE (warnings are always kept).
+    """
+    return {"sampled": sampled, **values}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, extra fields as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = " ".join(f"{k}={v}" for k, v in vars(record).items() if k not in _RESERVED)
+        if not extra:
+            return line
+        head, sep, tail = line.partition("\n")
+        return f"{head} {extra}{sep}{tail}"
+
+
+class _SampleFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.rate
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. Formatting is left to that thread;
+    only the message and traceback are resolved here, while the arguments
+    and exception are still alive.
+    """
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+
+
+def configure():
+    """Routes the app's loggers through the queue to stdout. Safe to call twice."""
+    global _handler
+    if _handler is not None:
+        return
+    if settings.LOG_FORMAT not in ("json", "text"):
+        raise ValueError(f"Unknown LOG_FORMAT {settings.LOG_FORMAT!r}, expected 'json' or 'text'")
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    _handler.addFilter(_SampleFilter(settings.LOG_SAMPLE_RATE))
+    listener = QueueListener(_handler.queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+def stats() -> dict:
+    if _handler is None:
+        return {}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
@@ -1,12 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from .db import Base, engine
-from .routers import games
+from . import log
+from .ai import speculative
+from .bus import build_bus
+from .codes import allocator
+from .config import settings
+from .llm import dispatcher, response_cache
+from .db import AsyncSessionLocal, async_engine, engine, replica_engine
+from .events import broker
+from .jobs import resume_pending_jobs
+from .live import live
+from .metrics import instrument_engine, metrics, record_requests
+from .replica import write_floors
+from .routers import admin, games
+from .routers.games import state_loads
+from .sharding import close_client, ring, route_to_owner, self_node
+from .state_cache import state_cache
+from .sweeper import sweep_periodically
+
+
+log.configure()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bus = build_bus(broker.deliver, broker.deliver_all)
+    if bus:
+        broker.bus = bus
+        bus.start()
+    if settings.GAME_ENGINE == "memory":
+        # Before resuming jobs, so rounds left generating are picked up in memory
+        live.open()
+    elif settings.GAME_ENGINE != "db":
+        raise ValueError(f"Unknown GAME_ENGINE {settings.GAME_ENGINE!r}, expected 'db' or 'memory'")
+    resume_pending_jobs()
+    gc_task = asyncio.create_task(sweep_periodically())
+    yield
+    gc_task.cancel()
+    if settings.GAME_ENGINE == "memory":
+        live.close()
+    if bus:
+        bus.close()
+    await close_client()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+if ring:
+    # Added before CORS so CORS stays outermost and covers proxied responses
+    app.middleware("http")(route_to_owner)
+
+for _engine in (engine, async_engine.sync_engine):
+    instrument_engine(_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine.sync_engine)
+# Outside the shard proxy, so proxied requests are counted (as "unmatched")
+app.middleware("http")(record_requests)
 
 origins = [
     "http://localhost:5173",
@@ -22,11 +79,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-State-Version"],
 )
 
 app.include_router(games.router)
+app.include_router(admin.router)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def stats():
+    async with AsyncSessionLocal() as db:
+        room_codes = await allocator.stats(db)
+    return {
+        "state_cache": state_cache.stats(),
+        "state_loads": state_loads.stats(),
+        "replica": write_floors.stats(),
+        "speculative_ai": speculative.stats(),
+        "llm_cache": response_cache.stats(),
+        "llm_dispatch": dispatcher.stats(),
+        "room_codes": room_codes,
+        "live_games": live.stats(),
+        "event_bus": broker.bus.stats() if broker.bus else None,
+        "shard": {"self": self_node, "nodes": ring.nodes} if ring else None,
+        "log": log.stats(),
+    }
@@ -0,0 +1,240 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+
+from .config import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+# Label for work done outside a request: AI jobs, the sweeper, live flushes
+BACKGROUND = "background"
+
+
+class RequestTimings:
+    """Where one request's time went; filled in by the hooks below."""
+
+    __slots__ = ("route", "queries", "db", "pool_wait", "llm", "serialize", "done")
+
+    def __init__(self):
+        self.route = None
+        self.queries = 0
+        self.db = 0.0
+        self.pool_wait = 0.0
+        self.llm = 0.0
+        self.serialize = 0.0
+        self.done = False
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Counters and histograms rendered in the Prometheus text format. Per-route
+    totals include a "background" route for work no request waited on.
+    """
+
+    COUNTERS = {
+        "partygame_http_requests_total": "HTTP requests by route and status",
+        "partygame_db_queries_total": "SQL statements executed",
+        "partygame_db_seconds_total": "Time spent executing SQL statements",
+        "partygame_db_pool_wait_seconds_total": "Time spent waiting for a pooled DB connection",
+        "partygame_llm_seconds_total": "Time spent waiting on the LLM provider",
+        "partygame_serialize_seconds_total": "Time spent rendering game state JSON",
+    }
+    HISTOGRAMS = {
+        "partygame_http_request_duration_seconds": "HTTP request latency",
+        "partygame_db_queries_per_request": "SQL statements per HTTP request",
+        "partygame_llm_call_seconds": "LLM provider call latency by request kind",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._histograms: dict[tuple, _Histogram] = {}
+
+    def inc(self, name: str, labels: tuple, value: float = 1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float, buckets=DURATION_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def record_request(self, method: str, status: int, seconds: float, timings: RequestTimings):
+        route = timings.route
+        self.inc("partygame_http_requests_total", (("method", method), ("route", route), ("status", str(status))))
+        self.observe("partygame_http_request_duration_seconds", (("method", method), ("route", route)), seconds)
+        self.observe("partygame_db_queries_per_request", (("route", route),), timings.queries, QUERY_BUCKETS)
+        self._add_totals((("route", route),), timings)
+
+    def _add_totals(self, labels: tuple, timings: RequestTimings):
+        for name, value in (
+            ("partygame_db_queries_total", timings.queries),
+            ("partygame_db_seconds_total", timings.db),
+            ("partygame_db_pool_wait_seconds_total", timings.pool_wait),
+            ("partygame_llm_seconds_total", timings.llm),
+            ("partygame_serialize_seconds_total", timings.serialize),
+        ):
+            if value:
+                self.inc(name, labels, value)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()
+            }
+        lines = []
+        for name, help_text in self.COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+        for name, help_text in self.HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (metric, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:g}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+def _add(field: str, value: float, queries: int = 0):
+    # Into the current request, or straight into the background totals
+    timings = _current.get()
+    if timings is None or timings.done:
+        timings = RequestTimings()
+        setattr(timings, field, value)
+        timings.queries = queries
+        metrics._add_totals((("route", BACKGROUND),), timings)
+        return
+    setattr(timings, field, getattr(timings, field) + value)
+    timings.queries += queries
+
+
+@contextmanager
+def timed(field: str):
+    """Adds the block's duration to the current request's llm or serialize time."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(field, time.perf_counter() - start)
+
+
+def observe_llm_call(kind: str, seconds: float):
+    metrics.observe("partygame_llm_call_seconds", (("kind", kind),), seconds)
+    _add("llm", seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _add("db", time.perf_counter() - conn.info["query_started"].pop(), queries=1)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        _add("db", time.perf_counter() - started.pop(), queries=1)
+
+
+def instrument_engine(engine):
+    """Counts and times the engine's statements and its pool checkout waits."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    # The pool has no event for the wait itself, so time the blocking get
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            _add("pool_wait", time.perf_counter() - start)
+    pool._do_get = timed_do_get
+
+
+def _server_timing(timings: RequestTimings, total: float) -> str:
+    return ", ".join((
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+        f"pool;dur={timings.pool_wait * 1000:.1f}",
+        f"llm;dur={timings.llm * 1000:.1f}",
+        f"serialize;dur={timings.serialize * 1000:.1f}",
+        f"total;dur={total * 1000:.1f}",
+    ))
+
+
+async def record_requests(request: Request, call_next):
+    """
+    HTTP middleware: per-route request counts, latency, SQL statements and DB,
+    pool, LLM and serialization time. Streaming responses are measured up to
+    their first byte; later work counts as background.
+    """
+    timings = RequestTimings()
+    token = _current.set(timings)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        _current.reset(token)
+        route = request.scope.get("route")
+        timings.route = route.path if route else "unmatched"
+        timings.done = True
+        metrics.record_request(request.method, status, elapsed, timings)
+    if settings.SERVER_TIMING:
+        response.headers["Server-Timing"] = _server_timing(timings, elapsed)
+    return response
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, TIMESTAMP, func
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, Text, TIMESTAMP, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -9,22 +9,35 @@ class Game(Base):
     __tablename__ = "games"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    code = Column(String(10), unique=True, nullable=False)
+    # NULL once the game has given its code back to the pool (see codes.py)
+    code = Column(String(10), unique=True, nullable=True)
     status = Column(String(20), nullable=False, default="lobby")
     round_number = Column(Integer, nullable=False, default=0)
     questions_per_player = Column(Integer, nullable=False, default=2)
+    # Bumped by every mutating route; exposed to clients as the state ETag
+    state_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Maintained alongside the inserts so "is everyone done?" is a row read
+    player_count = Column(Integer, nullable=False, default=0, server_default="0")
+    question_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Last write to the row; the sweeper expires games by it
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
-    players = relationship("Player", back_populates="game")
-    rounds = relationship("Round", back_populates="game")
-    questions = relationship("Question", back_populates="game")
+    # Children are removed by ON DELETE CASCADE in the database
+    players = relationship("Player", back_populates="game", passive_deletes=True)
+    rounds = relationship("Round", back_populates="game", passive_deletes=True)
+    questions = relationship("Question", back_populates="game", passive_deletes=True)
 
 
 class Player(Base):
     __tablename__ = "players"
+    __table_args__ = (
+        # Rejoin looks players up by name; also keeps names unique per game
+        Index("uq_players_game_id_name", "game_id", "name", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id"), nullable=False)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(64), nullable=False)
     score = Column(Integer, nullable=False, default=0)
     streak = Column(Integer, nullable=False, default=0)
@@ -35,25 +48,42 @@ class Player(Base):
 
 class Round(Base):
     __tablename__ = "rounds"
+    __table_args__ = (
+        Index("uq_rounds_game_id_round_index", "game_id", "round_index", unique=True),
+        # Foreign key columns not leading another index get their own, so the
+        # ON DELETE actions find the referencing rows without a table scan
+        Index("ix_rounds_ai_answer_id", "ai_answer_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id"), nullable=False)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
     question_text = Column(Text, nullable=False)
-    ai_answer_id = Column(UUID(as_uuid=True), ForeignKey("answers.id", use_alter=True, name="fk_round_ai_answer"), nullable=True)
+    ai_answer_id = Column(UUID(as_uuid=True), ForeignKey("answers.id", use_alter=True, name="fk_round_ai_answer", ondelete="SET NULL"), nullable=True)
     round_index = Column(Integer, nullable=False, default=0)
+    # Impostor answer drafted from the question alone (AI_DRAFT_MODE)
+    ai_draft_answer = Column(Text, nullable=True)
+    # Player answers (not counting the AI's) and votes submitted so far
+    answer_count = Column(Integer, nullable=False, default=0, server_default="0")
+    vote_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     game = relationship("Game", back_populates="rounds")
-    answers = relationship("Answer", back_populates="round", foreign_keys="[Answer.round_id]")
+    answers = relationship("Answer", back_populates="round", foreign_keys="[Answer.round_id]", passive_deletes=True)
 
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_game_id_player_id", "game_id", "player_id"),
+        Index("ix_questions_player_id", "player_id"),
+        Index("ix_questions_used_in_round_id", "used_in_round_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id"), nullable=False)
-    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
-    used_in_round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id"), nullable=True)
+    idempotency_key = Column(String(64), nullable=True)
+    used_in_round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id", ondelete="SET NULL"), nullable=True)
 
     game = relationship("Game", back_populates="questions")
     player = relationship("Player")
@@ -61,19 +91,32 @@ class Question(Base):
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # One answer per player per round (the AI answer has a NULL player_id)
+        Index("uq_answers_round_id_player_id", "round_id", "player_id", unique=True),
+        Index("ix_answers_player_id", "player_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id"), nullable=False)
-    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=True)
+    round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id", ondelete="CASCADE"), nullable=False)
+    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=True)
     text = Column(Text, nullable=False)
+    idempotency_key = Column(String(64), nullable=True)
 
     round = relationship("Round", back_populates="answers", foreign_keys=[round_id])
 
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        # One vote per player per round
+        Index("uq_votes_round_id_voter_player_id", "round_id", "voter_player_id", unique=True),
+        Index("ix_votes_voter_player_id", "voter_player_id"),
+        Index("ix_votes_answer_id_voted_for", "answer_id_voted_for"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id"), nullable=False)
-    voter_player_id = Column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
-    answer_id_voted_for = Column(UUID(as_uuid=True), ForeignKey("answers.id"), nullable=False)
+    round_id = Column(UUID(as_uuid=True), ForeignKey("rounds.id", ondelete="CASCADE"), nullable=False)
+    voter_player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    answer_id_voted_for = Column(UUID(as_uuid=True), ForeignKey("answers.id", ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String(64), nullable=True)
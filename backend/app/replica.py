@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .config import settings
+from .db import AsyncSessionLocal, ReplicaSessionLocal
+
+
+class WriteFloors:
+    """
+    Read-your-writes for state reads served by the replica. A write route
+    returns the lowest state_version that includes its write (X-State-Version)
+    and the client sends it back on its reads (?min_version=); on top of that
+    each room remembers the floor of the last write committed through this
+    process, so the subscribers woken by its publish don't read the version
+    before it. A read that finds the replica below the floor is redone on the
+    primary.
+    """
+
+    def __init__(self, max_rooms: int):
+        self.max_rooms = max_rooms
+        self._lock = threading.Lock()
+        self._floors: OrderedDict[str, int] = OrderedDict()
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def note(self, code: str, version: int):
+        with self._lock:
+            self._floors[code] = max(version, self._floors.get(code, 0))
+            self._floors.move_to_end(code)
+            while len(self._floors) > self.max_rooms:
+                self._floors.popitem(last=False)
+
+    def reset(self, code: str):
+        # A recycled room code starts over with a new game at version 0
+        with self._lock:
+            self._floors.pop(code, None)
+
+    def floor(self, code: str, min_version: Optional[int] = None) -> int:
+        with self._lock:
+            return max(min_version or 0, self._floors.get(code, 0))
+
+    async def read(self, floor: int, load):
+        """
+        Runs load(db, floor) on the replica, where it returns None if the game
+        is missing or older than floor, and if so load(db, 0) on the primary.
+        A missing game may just be one the replica hasn't seen created yet.
+        """
+        if ReplicaSessionLocal is not AsyncSessionLocal:
+            async with ReplicaSessionLocal() as db:
+                result = await load(db, floor)
+            if result is not None:
+                self.replica_reads += 1
+                return result
+            self.primary_reads += 1
+        async with AsyncSessionLocal() as db:
+            return await load(db, 0)
+
+    def stats(self) -> Optional[dict]:
+        if ReplicaSessionLocal is AsyncSessionLocal:
+            return None
+        with self._lock:
+            rooms = len(self._floors)
+        reads = self.replica_reads + self.primary_reads
+        return {
+            "rooms": rooms,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "primary_rate": self.primary_reads / reads if reads else 0.0,
+        }
+
+
+write_floors = WriteFloors(max_rooms=settings.STATE_CACHE_MAX_ROOMS)
@@ -0,0 +1,30 @@
+import asyncio
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from ..config import settings
+from ..sweeper import sweeper
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/gc")
+def gc_stats():
+    return sweeper.stats()
+
+
+@router.post("/gc")
+async def run_gc():
+    """Sweeps expired games now and reports the rows reclaimed by this run."""
+    reclaimed = await asyncio.to_thread(sweeper.sweep)
+    return {"reclaimed": reclaimed, **sweeper.stats()}
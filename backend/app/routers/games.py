@@ -1,90 +1,238 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
 from uuid import UUID
-import random, string
+import asyncio, random
 
-from ..db import SessionLocal
+from ..ai import speculative
+from ..codes import RoomCodesExhausted, allocator
+from ..config import settings
+from ..db import AsyncSessionLocal
 from .. import models, schemas
-from ..game_logic import create_rounds_safe
-from ..ai import generate_impostor_answer
+from ..game_logic import create_rounds_safe, score_round, touch_locked
+from ..events import broker
+from ..jobs import schedule_impostor_answer, schedule_round_drafts
+from ..live import live
+from ..metrics import timed
+from ..replica import write_floors
+from ..single_flight import SingleFlight
+from ..state_cache import state_cache
+from .. import tokens
+from ..tokens import PlayerSession, player_session, viewer_session
+from ..views import delta, dumps, loads, project
+
+# Seconds between SSE keepalive comments so proxies don't drop idle streams
+STREAM_KEEPALIVE_SECONDS = 15
+# Upper bound for ?wait= on the state endpoint, and how often a held request
+# rechecks the version in case the write happened in another worker
+MAX_LONG_POLL_SECONDS = 30
+LONG_POLL_RECHECK_SECONDS = 2
+# Write responses carry the lowest state_version that includes the write;
+# clients pass it back as ?min_version= so a replica read can't miss it
+STATE_VERSION_HEADER = "X-State-Version"
 
 router = APIRouter(prefix="/games", tags=["games"])
+# Concurrent state renders of the same room version share one DB load
+state_loads = SingleFlight()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def _get_game(db: AsyncSession, code: str, lock: bool = False) -> Optional[models.Game]:
+    query = select(models.Game).where(models.Game.code == code)
+    if lock:
+        # Phase transitions are decided while holding the game row, so concurrent
+        # submissions for the same room are serialized until this transaction ends
+        query = query.with_for_update()
+    return await db.scalar(query)
+
+
+def _session_player(session: PlayerSession, player_id: Optional[UUID]) -> UUID:
+    if player_id is not None and player_id != session.player_id:
+        raise HTTPException(status_code=403, detail="player_id doesn't match the player token")
+    return session.player_id
+
+
+def _check_live_game(live_game, session: PlayerSession):
+    # Same room code, different game: the code was recycled since the token was issued
+    if live_game.id != session.game_id:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+
+async def _get_session_game(db: AsyncSession, session: PlayerSession) -> Optional[models.Game]:
+    # By primary key and locked, like _get_game(lock=True); the token already
+    # tied the player to this game, so there's no need to look either up by code
+    game = await db.scalar(select(models.Game).where(models.Game.id == session.game_id).with_for_update())
+    if game is None or game.code != session.code:
+        return None
+    return game
+
+
+async def _is_replay(db: AsyncSession, model, idempotency_key: Optional[str], *criteria) -> bool:
+    # A retried submission carrying the same Idempotency-Key succeeds without effect
+    if not idempotency_key:
+        return False
+    return await _count(db, model, model.idempotency_key == idempotency_key, *criteria) > 0
+
+
+async def _count(db: AsyncSession, model, *criteria) -> int:
+    return await db.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+async def _increment(db: AsyncSession, model, row_id: UUID, column) -> int:
+    # Bumps a counter in SQL and returns the new value, so concurrent
+    # submissions can't both read the same count
+    return await db.scalar(
+        update(model).where(model.id == row_id).values({column: column + 1}).returning(column)
+    )
+
+
+async def _get_round(db: AsyncSession, game: models.Game, round_index: int) -> Optional[models.Round]:
+    return await db.scalar(
+        select(models.Round).where(models.Round.game_id == game.id, models.Round.round_index == round_index)
+    )
+
+
+def _publish_write(response: Response, code: str, version: int):
+    # Called after the commit; the floor is noted before subscribers wake
+    write_floors.note(code, version)
+    response.headers[STATE_VERSION_HEADER] = str(version)
+    broker.publish(code)
 
 
 @router.post("/create", response_model=schemas.CreateGameResponse)
-def create_game(db: Session = Depends(get_db)):
-    # Generate short code, e.g. 4-digit numeric or base36
-    code = "".join(random.choices(string.digits, k=4))
-
-    game = models.Game(code=code)
-    db.add(game)
-    db.commit()
-    db.refresh(game)
+async def create_game(db: AsyncSession = Depends(get_db)):
+    try:
+        game = await allocator.create_game(db)
+    except RoomCodesExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    write_floors.reset(game.code)
+    if settings.GAME_ENGINE == "memory":
+        live.add(game)
     return schemas.CreateGameResponse(game_id=game.id, code=game.code)
 
 
 @router.post("/join", response_model=schemas.JoinGameResponse)
-def join_game(req: schemas.JoinGameRequest, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == req.code).first()
+async def join_game(
+    req: schemas.JoinGameRequest,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Adds a player and issues their token. Joining again under a taken name
+    is a rejoin only with that player's token; without it the name is
+    refused (409), since a name alone would let anyone act as that player.
+    """
+    session = tokens.header_session(authorization)
+    live_game = live.get(req.code)
+    if live_game:
+        version = live_game.state_version
+        rejoining = session.player_id if session and session.game_id == live_game.id else None
+        player = await asyncio.to_thread(live.join, live_game, req.name, rejoining)
+        if live_game.state_version != version:
+            broker.publish(req.code)
+        return _joined(player.id, live_game.id, live_game.code)
+
+    game = await _get_game(db, req.code)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
+    game_id, game_code = game.id, game.code
 
     # Check if player exists (Rejoin logic)
-    existing_player = db.query(models.Player).filter(
-        models.Player.game_id == game.id,
+    existing_player = await db.scalar(select(models.Player).where(
+        models.Player.game_id == game_id,
         models.Player.name == req.name
-    ).first()
+    ))
 
     if existing_player:
-        return schemas.JoinGameResponse(
-            player_id=existing_player.id,
-            game_id=game.id,
-            code=game.code,
-        )
+        return _rejoined(existing_player.id, game_id, game_code, session)
 
     if game.status != "lobby":
         raise HTTPException(status_code=400, detail="Game already started")
 
-    player = models.Player(game_id=game.id, name=req.name)
+    player = models.Player(game_id=game_id, name=req.name)
     db.add(player)
-    db.commit()
-    db.refresh(player)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Lost a race with a simultaneous join under the same name
+        await db.rollback()
+        player = await db.scalar(select(models.Player).where(
+            models.Player.game_id == game_id,
+            models.Player.name == req.name
+        ))
+        if not player:
+            raise
+        return _rejoined(player.id, game_id, game_code, session)
+
+    # Joins don't lock the game, so the version comes back from the same update
+    version = await db.scalar(
+        update(models.Game).where(models.Game.id == game_id)
+        .values(player_count=models.Game.player_count + 1, state_version=models.Game.state_version + 1)
+        .returning(models.Game.state_version)
+    )
+    await db.commit()
+    _publish_write(response, game_code, version)
+
+    return _joined(player.id, game_id, game_code)
+
+
+def _rejoined(
+    player_id: UUID, game_id: UUID, code: str, session: Optional[PlayerSession]
+) -> schemas.JoinGameResponse:
+    if session is None or session.player_id != player_id or session.game_id != game_id:
+        raise HTTPException(status_code=409, detail="Name already taken in this game")
+    return _joined(player_id, game_id, code)
+
 
+def _joined(player_id: UUID, game_id: UUID, code: str) -> schemas.JoinGameResponse:
     return schemas.JoinGameResponse(
-        player_id=player.id,
-        game_id=game.id,
-        code=game.code,
+        player_id=player_id, game_id=game_id, code=code, token=tokens.issue(game_id, player_id, code),
     )
 
+
 @router.post("/{code}/start")
-def start_game(code: str, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def start_game(code: str, response: Response, db: AsyncSession = Depends(get_db)):
+    live_game = live.get(code)
+    if live_game:
+        await asyncio.to_thread(live.start, live_game)
+        broker.publish(code)
+        return {"status": "setup_questions"}
+
+    game = await _get_game(db, code, lock=True)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Count players
-    player_count = db.query(models.Player).filter(models.Player.game_id == game.id).count()
-    if player_count < 2:
+    if game.player_count < 2:
         raise HTTPException(status_code=400, detail="Need at least 2 players to start")
 
     game.status = "setup_questions"
     game.round_number = 0
-    db.commit()
+    version = touch_locked(game)
+    await db.commit()
+    _publish_write(response, code, version)
     
     return {"status": "setup_questions"}
 
 
 @router.post("/{code}/set-question-count")
-def set_question_count(code: str, req: schemas.SetQuestionCountRequest, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def set_question_count(
+    code: str, req: schemas.SetQuestionCountRequest, response: Response, db: AsyncSession = Depends(get_db)
+):
+    live_game = live.get(code)
+    if live_game:
+        await asyncio.to_thread(live.set_question_count, live_game, req.count)
+        broker.publish(code)
+        return {"status": "write_questions", "count": req.count}
+
+    game = await _get_game(db, code, lock=True)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
@@ -95,215 +243,299 @@ def set_question_count(code: str, req: schemas.SetQuestionCountRequest, db: Sess
 
     game.questions_per_player = req.count
     game.status = "write_questions"
-    db.commit()
+    version = touch_locked(game)
+    await db.commit()
+    _publish_write(response, code, version)
     return {"status": "write_questions", "count": req.count}
 
 
 @router.post("/{code}/submit-question")
-def submit_question(code: str, req: schemas.SubmitQuestionRequest, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def submit_question(
+    code: str,
+    req: schemas.SubmitQuestionRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    session: PlayerSession = Depends(player_session),
+    db: AsyncSession = Depends(get_db),
+):
+    player_id = _session_player(session, req.player_id)
+    live_game = live.get(code)
+    if live_game:
+        _check_live_game(live_game, session)
+        rounds = await asyncio.to_thread(live.submit_question, live_game, player_id, req.text, idempotency_key)
+        broker.publish(code)
+        if rounds and settings.AI_DRAFT_MODE != "off":
+            schedule_round_drafts(code, rounds)
+        return {"status": "submitted"}
+
+    game = await _get_session_game(db, session)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
+    if await _is_replay(
+        db, models.Question, idempotency_key,
+        models.Question.game_id == game.id,
+        models.Question.player_id == player_id
+    ):
+        # The original write's version is at most the locked one
+        response.headers[STATE_VERSION_HEADER] = str(game.state_version)
+        return {"status": "submitted"}
+
     if game.status != "write_questions":
         raise HTTPException(status_code=400, detail="Not in question writing phase")
 
     # Check if player already submitted enough questions
-    count = db.query(models.Question).filter(
+    count = await _count(
+        db, models.Question,
         models.Question.game_id == game.id,
-        models.Question.player_id == req.player_id
-    ).count()
+        models.Question.player_id == player_id
+    )
 
     if count >= game.questions_per_player:
         raise HTTPException(status_code=400, detail="Max questions reached for this player")
 
     question = models.Question(
         game_id=game.id,
-        player_id=req.player_id,
-        text=req.text
+        player_id=player_id,
+        text=req.text,
+        idempotency_key=idempotency_key
     )
     db.add(question)
-    db.commit()
+    version = touch_locked(game)
+    await db.flush()
     
     # Check if all players have submitted all questions
-    total_players = db.query(models.Player).filter(models.Player.game_id == game.id).count()
-    total_questions = db.query(models.Question).filter(models.Question.game_id == game.id).count()
-    
-    if total_questions >= total_players * game.questions_per_player:
-        # All questions submitted! Advance to first round
-        create_rounds_safe(db, game)
-
+    total_questions = await _increment(db, models.Game, game.id, models.Game.question_count)
+
+    rounds = []
+    if total_questions >= game.player_count * game.questions_per_player:
+        # All questions submitted! Advance to first round (commits)
+        rounds = await db.run_sync(create_rounds_safe, game)
+    else:
+        await db.commit()
+
+    _publish_write(response, code, version)
+    if rounds and settings.AI_DRAFT_MODE != "off":
+        schedule_round_drafts(code, rounds)
     return {"status": "submitted"}
 
 
 @router.post("/{code}/submit-answer")
-def submit_answer(code: str, req: schemas.SubmitAnswerRequest, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def submit_answer(
+    code: str,
+    req: schemas.SubmitAnswerRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    session: PlayerSession = Depends(player_session),
+    db: AsyncSession = Depends(get_db),
+):
+    player_id = _session_player(session, req.player_id)
+    live_game = live.get(code)
+    if live_game:
+        _check_live_game(live_game, session)
+        submitted = await asyncio.to_thread(live.submit_answer, live_game, player_id, req.text, idempotency_key)
+        if submitted:
+            round_id, question_text, answer_texts, all_answered = submitted
+            if not _should_prefetch(round_id, len(answer_texts), len(live_game.players)):
+                answer_texts = None
+            _after_answer(code, round_id, question_text, all_answered, answer_texts)
+            broker.publish(code)
+        return {"status": "submitted"}
+
+    game = await _get_session_game(db, session)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
+    if await _is_replay(
+        db, models.Answer, idempotency_key,
+        models.Answer.player_id == player_id,
+        models.Answer.round_id.in_(select(models.Round.id).where(models.Round.game_id == game.id))
+    ):
+        # The original write's version is at most the locked one
+        response.headers[STATE_VERSION_HEADER] = str(game.state_version)
+        return {"status": "submitted"}
+
     if game.status != "answering":
         raise HTTPException(status_code=400, detail="Not in answering phase")
 
-    current_round = (
-        db.query(models.Round)
-        .filter(models.Round.game_id == game.id, models.Round.round_index == game.round_number)
-        .first()
-    )
+    current_round = await _get_round(db, game, game.round_number)
     if not current_round:
         raise HTTPException(status_code=500, detail="Current round not found")
 
         # Check if already answered
-    existing = db.query(models.Answer).filter(
+    existing = await db.scalar(select(models.Answer).where(
         models.Answer.round_id == current_round.id,
-        models.Answer.player_id == req.player_id
-    ).first()
+        models.Answer.player_id == player_id
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Already answered this round")
 
     answer = models.Answer(
         round_id=current_round.id,
-        player_id=req.player_id,
-        text=req.text.lower()
+        player_id=player_id,
+        text=req.text.lower(),
+        idempotency_key=idempotency_key
     )
     db.add(answer)
-    db.commit()
+    version = touch_locked(game)
+    await db.flush()
 
     # Check if all players answered
     # Note: In a real game, we might want to exclude the player who wrote the question?
     # Requirement said: "Each player view shows the current question and a submission box for their answer"
     # Doesn't explicitly say the author is excluded. Assuming all players answer for now.
-    
-    total_players = db.query(models.Player).filter(models.Player.game_id == game.id).count()
-    total_answers = db.query(models.Answer).filter(models.Answer.round_id == current_round.id).count()
+    total_answers = await _increment(db, models.Round, current_round.id, models.Round.answer_count)
+
+    all_answered = total_answers >= game.player_count
+    if all_answered:
+        # All answers in. The AI impostor answer is generated in the background;
+        # the job moves the game on to voting when it's done
+        game.status = "generating"
+    await db.commit()
+
+    answer_texts = None
+    if not all_answered and _should_prefetch(current_round.id, total_answers, game.player_count):
+        answer_texts = list(await db.scalars(
+            select(models.Answer.text).where(models.Answer.round_id == current_round.id)
+        ))
+    _after_answer(code, current_round.id, current_round.question_text, all_answered, answer_texts)
+
+    _publish_write(response, code, version)
+    return {"status": "submitted"}
 
-    if total_answers >= total_players:
-        # All answers in. Generate AI Impostor Answer
-        current_answers = db.query(models.Answer).filter(models.Answer.round_id == current_round.id).all()
-        answer_texts = [a.text for a in current_answers]
-        
-        print(f"DEBUG: Generating AI answer for question: {current_round.question_text}")
-        print(f"DEBUG: Player answers: {answer_texts}")
-        
-        ai_text = generate_impostor_answer(current_round.question_text, answer_texts)
-        
-        ai_answer = models.Answer(
-            round_id=current_round.id,
-            player_id=None, # AI
-            text=ai_text.lower()
-        )
-        db.add(ai_answer)
-        
-        # Update Round with the AI answer ID
-        db.flush() # Get ID
-        current_round.ai_answer_id = ai_answer.id
-        
-        # Transition to voting
-        game.status = "voting"
-        db.commit()
 
-    return {"status": "submitted"}
+def _should_prefetch(round_id: UUID, total_answers: int, total_players: int) -> bool:
+    return bool(
+        settings.AI_SPECULATIVE_FRACTION
+        and total_answers >= total_players * settings.AI_SPECULATIVE_FRACTION
+        and not speculative.has(round_id)
+    )
+
+
+def _after_answer(code: str, round_id: UUID, question_text: str, all_answered: bool, answer_texts: Optional[list]):
+    if all_answered:
+        schedule_impostor_answer(code, round_id)
+    elif answer_texts is not None:
+        # Enough answers to get a head start on the impostor answer
+        speculative.prefetch(round_id, question_text, answer_texts)
 
 
 @router.post("/{code}/submit-vote")
-def submit_vote(code: str, req: schemas.SubmitVoteRequest, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def submit_vote(
+    code: str,
+    req: schemas.SubmitVoteRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    session: PlayerSession = Depends(player_session),
+    db: AsyncSession = Depends(get_db),
+):
+    player_id = _session_player(session, req.player_id)
+    live_game = live.get(code)
+    if live_game:
+        _check_live_game(live_game, session)
+        await asyncio.to_thread(live.submit_vote, live_game, player_id, req.answer_id, idempotency_key)
+        broker.publish(code)
+        return {"status": "voted"}
+
+    game = await _get_session_game(db, session)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
+    if await _is_replay(
+        db, models.Vote, idempotency_key,
+        models.Vote.voter_player_id == player_id,
+        models.Vote.round_id.in_(select(models.Round.id).where(models.Round.game_id == game.id))
+    ):
+        # The original write's version is at most the locked one
+        response.headers[STATE_VERSION_HEADER] = str(game.state_version)
+        return {"status": "voted"}
+
     if game.status != "voting":
         raise HTTPException(status_code=400, detail="Not in voting phase")
 
-    current_round = (
-        db.query(models.Round)
-        .filter(models.Round.game_id == game.id, models.Round.round_index == game.round_number)
-        .first()
-    )
-    
-    # Check if player is trying to vote for their own answer
-    player_answer = db.query(models.Answer).filter(
-        models.Answer.round_id == current_round.id,
-        models.Answer.player_id == req.player_id
-    ).first()
+    current_round = await _get_round(db, game, game.round_number)
     
-    if player_answer and player_answer.id == req.answer_id:
+    # The answer must be in this round (score_round can't credit any other),
+    # and not the player's own
+    voted_for = await db.scalar(select(models.Answer).where(
+        models.Answer.id == req.answer_id,
+        models.Answer.round_id == current_round.id
+    ))
+
+    if voted_for is None:
+        raise HTTPException(status_code=400, detail="Answer not found in this round")
+    if voted_for.player_id == player_id:
         raise HTTPException(status_code=400, detail="You cannot vote for your own answer")
     
     # Check if already voted
-    existing = db.query(models.Vote).filter(
+    existing = await db.scalar(select(models.Vote).where(
         models.Vote.round_id == current_round.id,
-        models.Vote.voter_player_id == req.player_id
-    ).first()
+        models.Vote.voter_player_id == player_id
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Already voted")
 
     vote = models.Vote(
         round_id=current_round.id,
-        voter_player_id=req.player_id,
-        answer_id_voted_for=req.answer_id
+        voter_player_id=player_id,
+        answer_id_voted_for=req.answer_id,
+        idempotency_key=idempotency_key
     )
     db.add(vote)
-    db.commit()
+    version = touch_locked(game)
+    await db.flush()
     
     # Check if all votes in
-    total_players = db.query(models.Player).filter(models.Player.game_id == game.id).count()
-    total_votes = db.query(models.Vote).filter(models.Vote.round_id == current_round.id).count()
-    
-    if total_votes >= total_players:
+    total_votes = await _increment(db, models.Round, current_round.id, models.Round.vote_count)
+
+    if total_votes >= game.player_count:
         # Reveal phase
         game.status = "reveal"
         
-        # Calculate scores
-        votes = db.query(models.Vote).filter(models.Vote.round_id == current_round.id).all()
-        ai_answer_id = current_round.ai_answer_id
-        
-        round_answers = db.query(models.Answer).filter(models.Answer.round_id == current_round.id).all()
-        answer_author_map = {a.id: a.player_id for a in round_answers}
-
-        for vote in votes:
-            voter = db.query(models.Player).filter(models.Player.id == vote.voter_player_id).first()
-            
-            if vote.answer_id_voted_for == ai_answer_id:
-                # Correct
-                voter.streak += 1
-                # Bonus: 500 base + (streak-1)*50 bonus
-                bonus = (voter.streak - 1) * 50
-                if bonus < 0: bonus = 0
-                points = 500 + bonus
-                voter.score += points
-            else:
-                # Incorrect
-                voter.streak = 0
-                voter.score -= 250
-                
-                # Award the writer of the answer (if human)
-                author_id = answer_author_map.get(vote.answer_id_voted_for)
-                if author_id:
-                    author = db.query(models.Player).filter(models.Player.id == author_id).first()
-                    if author:
-                        author.score += 250
-        
-        db.commit()
-
+        # Calculate scores: one query for the votes with their answers' authors,
+        # one for the players, then a single bulk update of the changed rows
+        votes = (await db.execute(
+            select(models.Vote.voter_player_id, models.Vote.answer_id_voted_for, models.Answer.player_id)
+            .outerjoin(models.Answer, models.Answer.id == models.Vote.answer_id_voted_for)
+            .where(models.Vote.round_id == current_round.id)
+        )).all()
+        players = {
+            pid: (score, streak) for pid, score, streak in (await db.execute(
+                select(models.Player.id, models.Player.score, models.Player.streak)
+                .where(models.Player.game_id == game.id)
+            ))
+        }
+
+        new_scores = score_round(votes, current_round.ai_answer_id, players)
+        if new_scores:
+            await db.execute(update(models.Player), [
+                {"id": pid, "score": score, "streak": streak}
+                for pid, (score, streak) in new_scores.items()
+            ])
+
+    await db.commit()
+    _publish_write(response, code, version)
     return {"status": "voted"}
 
 
 @router.post("/{code}/next-round")
-def next_round(code: str, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
+async def next_round(code: str, response: Response, db: AsyncSession = Depends(get_db)):
+    live_game = live.get(code)
+    if live_game:
+        status = await asyncio.to_thread(live.next_round, live_game)
+        broker.publish(code)
+        return {"status": status}
+
+    game = await _get_game(db, code, lock=True)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
     # If we're in reveal, transition to leaderboard
     if game.status == "reveal":
         # Check if there's a next round
-        next_round_index = game.round_number + 1
-        next_round_obj = db.query(models.Round).filter(
-            models.Round.game_id == game.id,
-            models.Round.round_index == next_round_index
-        ).first()
+        next_round_obj = await _get_round(db, game, game.round_number + 1)
         
         if next_round_obj:
             # There's another round, go to leaderboard first
@@ -312,47 +544,40 @@ def next_round(code: str, db: Session = Depends(get_db)):
             # No more rounds, go straight to finished
             game.status = "finished"
         
-        db.commit()
+        version = touch_locked(game)
+        await db.commit()
+        _publish_write(response, code, version)
         return {"status": game.status}
     
     # If we're in leaderboard, go to the next round
     if game.status == "leaderboard":
         game.round_number += 1
         game.status = "answering"
-        db.commit()
+        version = touch_locked(game)
+        await db.commit()
+        _publish_write(response, code, version)
         return {"status": game.status}
         
-    db.commit()
     return {"status": game.status}
 
 
-@router.get("/{code}/state", response_model=schemas.GameState)
-def get_game_state(code: str, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-
-    players = db.query(models.Player).filter(models.Player.game_id == game.id).all()
+async def build_game_state(db: AsyncSession, game: models.Game) -> schemas.GameState:
+    players = (await db.scalars(select(models.Player).where(models.Player.game_id == game.id))).all()
 
     # get current round (if any)
-    current_round = (
-        db.query(models.Round)
-        .filter(models.Round.game_id == game.id, models.Round.round_index == game.round_number)
-        .first()
-    )
+    current_round = await _get_round(db, game, game.round_number)
 
     answers = []
+    votes = []
     question_text = None
     current_round_id = None
 
     if current_round:
         current_round_id = current_round.id
         question_text = current_round.question_text
-        answers = (
-            db.query(models.Answer)
-            .filter(models.Answer.round_id == current_round.id)
-            .all()
-        )
+        answers = list(await db.scalars(
+            select(models.Answer).where(models.Answer.round_id == current_round.id)
+        ))
         
         # Stable sort based on hash of answer ID + current round ID to ensure consistent random order for all clients
         # Or just sort by ID if we want stable but non-random (but we want random)
@@ -363,6 +588,8 @@ def get_game_state(code: str, db: Session = Depends(get_db)):
         r = random.Random(str(current_round.id))
         r.shuffle(answers)
 
+        votes = (await db.scalars(select(models.Vote).where(models.Vote.round_id == current_round.id))).all()
+
     return schemas.GameState(
         game_id=game.id,
         code=game.code,
@@ -373,44 +600,226 @@ def get_game_state(code: str, db: Session = Depends(get_db)):
         current_round_id=current_round_id,
         question_text=question_text,
         answers=answers,
-        votes=current_round and db.query(models.Vote).filter(models.Vote.round_id == current_round.id).all() or []
+        votes=votes,
+        state_version=game.state_version,
     )
 
 
-@router.delete("/{code}")
-def delete_game(code: str, db: Session = Depends(get_db)):
-    game = db.query(models.Game).filter(models.Game.code == code).first()
-    if not game:
+async def _load_state_etag(code: str, min_version: Optional[int] = None):
+    live_game = live.get(code)
+    if live_game:
+        return _etag(*live.version(live_game))
+
+    async def load(db: AsyncSession, floor: int):
+        row = (await db.execute(
+            select(models.Game.id, models.Game.state_version).where(models.Game.code == code)
+        )).first()
+        return _etag(*row) if row and row.state_version >= floor else None
+    return await write_floors.read(write_floors.floor(code, min_version), load)
+
+
+def _etag(game_id: UUID, version: int) -> str:
+    # Include the game id so a recycled room code never matches a stale ETag
+    return f'"{game_id.hex}.{version}"'
+
+
+def _etag_version(etag: str) -> int:
+    return int(etag.strip('"').rpartition(".")[2])
+
+
+@router.get("/{code}/state", response_model=schemas.GameState)
+async def get_game_state(
+    code: str,
+    wait: float = Query(0, ge=0, le=MAX_LONG_POLL_SECONDS),
+    view: Literal["host", "player", "phase"] = "player",
+    since_version: Optional[int] = Query(None, ge=0),
+    min_version: Optional[int] = Query(None, ge=0),
+    if_none_match: Optional[str] = Header(None),
+    viewer: Optional[PlayerSession] = Depends(viewer_session),
+):
+    """
+    Returns the GameState with its state_version as the ETag. A client
+    sending a current If-None-Match gets a 304 after a single version lookup;
+    with ?wait=N the request is held until the version changes or N seconds pass.
+    ?view= picks a projection (see views.project). The default "player" view
+    adds the caller's own answer and vote when they send their player token;
+    without one it hides authors and votes until the reveal, like "host".
+    ?since_version=N returns a delta against that version when the server
+    still remembers it, or the whole projection otherwise. ?min_version= is the
+    X-State-Version of the client's last write, which the state will include.
+    """
+    queue = broker.subscribe(code) if wait and if_none_match else None
+    try:
+        etag = await _load_state_etag(code, min_version)
+        if etag is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        if if_none_match == etag and queue is not None:
+            deadline = asyncio.get_running_loop().time() + wait
+            while etag is not None and if_none_match == etag:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                # Wake on a local publish, or recheck periodically for writes
+                # handled by another worker process
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=min(remaining, LONG_POLL_RECHECK_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                etag = await _load_state_etag(code, min_version)
+            if etag is None:
+                raise HTTPException(status_code=404, detail="Game not found")
+    finally:
+        if queue is not None:
+            broker.unsubscribe(code, queue)
+
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    rendered = await _load_rendered_state(code, etag)
+    if rendered is None:
         raise HTTPException(status_code=404, detail="Game not found")
-    
-    # 1. Break circular dependency between Round and Answer (ai_answer_id)
-    # Set ai_answer_id to NULL for all rounds in this game
-    rounds = db.query(models.Round).filter(models.Round.game_id == game.id).all()
-    for r in rounds:
-        r.ai_answer_id = None
-    db.commit() # Commit to release the foreign key constraint
-
-    # 2. Delete Votes
-    db.query(models.Vote).filter(models.Vote.round_id.in_(
-        db.query(models.Round.id).filter(models.Round.game_id == game.id)
-    )).delete(synchronize_session=False)
-    
-    # 3. Delete Answers
-    db.query(models.Answer).filter(models.Answer.round_id.in_(
-        db.query(models.Round.id).filter(models.Round.game_id == game.id)
-    )).delete(synchronize_session=False)
-    
-    # 4. Delete Questions (Moved before Rounds because Questions reference Rounds)
-    db.query(models.Question).filter(models.Question.game_id == game.id).delete(synchronize_session=False)
+    etag, body = _render_view(code, rendered, view, viewer, since_version)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
-    # 5. Delete Rounds
-    db.query(models.Round).filter(models.Round.game_id == game.id).delete(synchronize_session=False)
-    
-    # 6. Delete Players
-    db.query(models.Player).filter(models.Player.game_id == game.id).delete(synchronize_session=False)
-    
-    # 7. Delete Game
-    db.delete(game)
-    db.commit()
+
+async def _load_rendered_state(code: str, etag: Optional[str] = None, min_version: Optional[int] = None):
+    """
+    Returns (etag, JSON bytes) for the room's current state, from state_cache
+    when it holds the current version, or None if the game doesn't exist.
+    A caller that already looked up the etag shares the database load with
+    concurrent callers for the same (code, etag), e.g. a room's pollers all
+    arriving right after a phase change. The state is at least as new as
+    etag, or as the room's write floor and min_version without one.
+    """
+    live_game = live.get(code)
+    if live_game:
+        etag = _etag(*live.version(live_game))
+        body = state_cache.get(code, etag)
+        if body is None:
+            game_id, version, state = live.state(live_game)
+            with timed("serialize"):
+                etag, body = _etag(game_id, version), state.model_dump_json().encode()
+            state_cache.put(code, etag, body)
+        return etag, body
+
+    if etag is not None:
+        body = state_cache.get(code, etag)
+        if body is not None:
+            return etag, body
+        return await state_loads.do((code, etag), lambda: _render_from_db(code, _etag_version(etag)))
+    return await _render_from_db(code, write_floors.floor(code, min_version))
+
+
+async def _render_from_db(code: str, floor: int):
+    async def load(db: AsyncSession, floor: int):
+        game = await _get_game(db, code)
+        if not game or game.state_version < floor:
+            return None
+        etag = _etag(game.id, game.state_version)
+        body = state_cache.get(code, etag)
+        if body is None:
+            state = await build_game_state(db, game)
+            with timed("serialize"):
+                body = state.model_dump_json().encode()
+            state_cache.put(code, etag, body)
+        return etag, body
+    return await write_floors.read(floor, load)
+
+
+def _render_view(
+    code: str, rendered: tuple, view: str, session: Optional[PlayerSession], since_version: Optional[int]
+):
+    """
+    Returns (etag, JSON bytes) of the requested projection of a rendered full
+    state, cached in state_cache next to the full state.
+    """
+    etag, body = rendered
+    viewer = str(session.player_id) if view == "player" and session is not None else None
+    variant = f"{view}:{viewer or ''}:{'' if since_version is None else since_version}"
+    cached = state_cache.get(code, etag, variant)
+    if cached is not None:
+        return etag, cached
+
+    with timed("serialize"):
+        full = loads(body)
+        state = project(full, view, viewer)
+        if since_version is not None:
+            base = state_cache.past(code, _etag(UUID(full["game_id"]), since_version))
+            if base is not None:
+                state = delta(project(loads(base), view, viewer), state)
+        projected = dumps(state)
+    state_cache.put(code, etag, projected, variant)
+    return etag, projected
+
+
+@router.get("/{code}/stream")
+async def stream_game_state(
+    code: str,
+    view: Literal["host", "player", "phase"] = "player",
+    min_version: Optional[int] = Query(None, ge=0),
+    viewer: Optional[PlayerSession] = Depends(viewer_session),
+):
+    """
+    Server-Sent Events stream of GameState snapshots. A snapshot is pushed
+    on connect and again whenever a mutating route publishes for this room.
+    Takes the same ?view= and ?min_version= as the state endpoint, and the
+    player token as ?token= since EventSource can't send headers.
+    """
+    queue = broker.subscribe(code)
+    try:
+        rendered = await _load_rendered_state(code, min_version=min_version)
+    except Exception:
+        broker.unsubscribe(code, queue)
+        raise
+    if rendered is None:
+        broker.unsubscribe(code, queue)
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    async def events(rendered):
+        try:
+            last_etag, body = _render_view(code, rendered, view, viewer, None)
+            yield b"data: " + body + b"\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                # Every subscriber wakes on the same publish; a version lookup
+                # each, then one shared load of the new state
+                etag = await _load_state_etag(code)
+                if etag == last_etag:
+                    continue
+                rendered = await _load_rendered_state(code, etag) if etag else None
+                if rendered is None:
+                    yield "event: deleted\ndata: {}\n\n"
+                    return
+                last_etag, body = _render_view(code, rendered, view, viewer, None)
+                yield b"data: " + body + b"\n\n"
+        finally:
+            broker.unsubscribe(code, queue)
+
+    return StreamingResponse(
+        events(rendered),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/{code}")
+async def delete_game(code: str, db: AsyncSession = Depends(get_db)):
+    if live.get(code):
+        await asyncio.to_thread(live.remove, code)
+    # Players, rounds, questions, answers and votes go with it (ON DELETE CASCADE)
+    result = await db.execute(delete(models.Game).where(models.Game.code == code))
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Game not found")
+    await db.commit()
+    broker.publish(code)
     
     return {"status": "deleted"}
@@ -41,6 +41,7 @@ class GameState(BaseModel):
     question_text: Optional[str]
     answers: List[AnswerBase]
     votes: List[VoteBase] = []
+    state_version: int = 0
     # can add more later as needed
 
 
@@ -58,18 +59,21 @@ class JoinGameResponse(BaseModel):
     player_id: UUID
     game_id: UUID
     code: str
+    # Send as "Authorization: Bearer <token>" to the submit routes
+    token: str
 
 class SetQuestionCountRequest(BaseModel):
     count: int
 
+# The player comes from the token; player_id, if sent, must match it
 class SubmitQuestionRequest(BaseModel):
-    player_id: UUID
+    player_id: Optional[UUID] = None
     text: str
 
 class SubmitAnswerRequest(BaseModel):
-    player_id: UUID
+    player_id: Optional[UUID] = None
     text: str
 
 class SubmitVoteRequest(BaseModel):
-    player_id: UUID
+    player_id: Optional[UUID] = None
     answer_id: UUID
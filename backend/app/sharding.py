@@ -0,0 +1,132 @@
+import bisect
+import hashlib
+import json
+import logging
+import re
+from typing import Optional
+
+import httpx
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from .config import settings
+from .log import fields
+
+# Points per node on the ring; more points spread rooms more evenly
+RING_REPLICAS = 128
+# Set on proxied requests so a misconfigured ring can't bounce them around
+FORWARDED_HEADER = "x-shard-forwarded"
+# Per-connection headers, not copied between the two hops
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "host"}
+
+logger = logging.getLogger(__name__)
+
+ROOM_PATH = re.compile(r"^/games/(?!create$|join$)([^/]+)(?:/|$)")
+
+
+class HashRing:
+    """Consistent hashing of room codes onto node URLs."""
+
+    def __init__(self, nodes: list[str], replicas: int = RING_REPLICAS):
+        self.nodes = nodes
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+def _parse_nodes(value: str) -> list[str]:
+    return [node.strip().rstrip("/") for node in value.split(",") if node.strip()]
+
+
+ring = HashRing(_parse_nodes(settings.SHARD_NODES)) if settings.SHARD_NODES else None
+self_node = settings.SHARD_SELF.rstrip("/")
+if ring and self_node not in ring.nodes:
+    raise ValueError(f"SHARD_SELF {settings.SHARD_SELF!r} must be one of SHARD_NODES")
+
+
+def owns(code: str) -> bool:
+    """True if this node serves the room (always, when sharding is off)."""
+    return ring is None or ring.owner(code) == self_node
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        # No read timeout: long-polls and SSE streams are proxied too
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None))
+    return _client
+
+
+async def close_client():
+    if _client is not None:
+        await _client.aclose()
+
+
+async def _room_code(request: Request) -> Optional[str]:
+    match = ROOM_PATH.match(request.url.path)
+    if match:
+        return match.group(1)
+    if request.url.path == "/games/join" and request.method == "POST":
+        try:
+            return json.loads(await request.body()).get("code")
+        except (ValueError, AttributeError):
+            return None
+    return None
+
+
+async def route_to_owner(request: Request, call_next):
+    """
+    HTTP middleware: requests for a room owned by another node are proxied
+    there, so every read and write of a room (and its in-process state,
+    caches and subscribers) lives on one node. Room creation is served
+    locally; the code allocator only hands out codes this node owns.
+    """
+    if request.headers.get(FORWARDED_HEADER):
+        return await call_next(request)
+    code = await _room_code(request)
+    if code is None or owns(code):
+        return await call_next(request)
+
+    owner = ring.owner(code)
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS]
+    headers.append((FORWARDED_HEADER, self_node))
+    client = _get_client()
+    try:
+        upstream = await client.send(
+            client.build_request(
+                request.method,
+                owner + request.url.path,
+                params=request.query_params,
+                headers=headers,
+                content=await request.body(),
+            ),
+            stream=True,
+        )
+    except httpx.HTTPError as e:
+        logger.warning("Shard proxy failed", extra=fields(owner=owner, code=code, error=str(e)))
+        return JSONResponse({"detail": "Room is on a node that isn't reachable"}, status_code=502)
+    # CORS headers come from this node's middleware
+    response_headers = {
+        k: v for k, v in upstream.headers.items()
+        if k.lower() not in HOP_HEADERS and not k.lower().startswith("access-control-")
+    }
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=response_headers,
+        background=BackgroundTask(upstream.aclose),
+    )
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one run of the load: the first
+    caller starts it as a task and later ones await that task. The task is
+    shielded, so a caller that goes away (a client disconnecting) doesn't
+    cancel it for the others. Keys are forgotten as soon as the load ends;
+    caching its result is up to the caller. One event loop only.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.loads += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        self._calls.pop(key, None)
+        # Marks a failure as seen even if every caller went away before it
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        requests = self.loads + self.coalesced
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+            "coalesced_rate": self.coalesced / requests if requests else 0.0,
+        }
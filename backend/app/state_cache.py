@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .config import settings
+from .events import broker
+
+FULL = "full"
+# Past full states kept per room, the bases for since_version deltas
+HISTORY_VERSIONS = 8
+# Cap on projections (view, player, since_version) cached for one version
+MAX_VARIANTS = 256
+
+
+class _Room:
+    __slots__ = ("etag", "variants", "history")
+
+    def __init__(self):
+        self.etag = None
+        self.variants: dict[str, bytes] = {}
+        self.history: OrderedDict[str, bytes] = OrderedDict()
+
+
+class StateCache:
+    """
+    LRU cache of rendered GameState JSON, one entry per room code tagged with
+    the ETag (game id + state_version) it was rendered at. A lookup only hits
+    when the caller's current ETag matches, so a stale body is never served.
+    Besides the full state an entry holds the projections rendered from it
+    (variants), and the full states of the last few versions for deltas.
+    """
+
+    def __init__(self, max_rooms: int):
+        self.max_rooms = max_rooms
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Room] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, code: str, etag: str, variant: str = FULL) -> Optional[bytes]:
+        with self._lock:
+            room = self._entries.get(code)
+            body = room.variants.get(variant) if room is not None and room.etag == etag else None
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+            return body
+
+    def put(self, code: str, etag: str, body: bytes, variant: str = FULL):
+        with self._lock:
+            room = self._entries.get(code)
+            if room is None:
+                room = self._entries[code] = _Room()
+            if room.etag != etag:
+                room.etag = etag
+                room.variants = {}
+            if variant == FULL or len(room.variants) < MAX_VARIANTS:
+                room.variants[variant] = body
+            if variant == FULL:
+                room.history[etag] = body
+                room.history.move_to_end(etag)
+                while len(room.history) > HISTORY_VERSIONS:
+                    room.history.popitem(last=False)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_rooms:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def past(self, code: str, etag: str) -> Optional[bytes]:
+        """The full state the room had at etag, if it is still remembered."""
+        with self._lock:
+            room = self._entries.get(code)
+            return room.history.get(etag) if room is not None else None
+
+    def invalidate(self, code: str):
+        # The current version is stale; its history stays for deltas
+        with self._lock:
+            room = self._entries.get(code)
+            if room is not None:
+                room.etag = None
+                room.variants = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "rooms": len(self._entries),
+                "max_rooms": self.max_rooms,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+state_cache = StateCache(max_rooms=settings.STATE_CACHE_MAX_ROOMS)
+# Write routes publish after committing; drop the room's entry right away
+broker.add_listener(state_cache.invalidate)
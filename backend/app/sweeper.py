@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, or_, select
+
+from . import models
+from .config import settings
+from .db import SessionLocal
+from .events import broker
+
+logger = logging.getLogger(__name__)
+
+RECLAIMED_TABLES = ["games", "players", "rounds", "questions", "answers", "votes"]
+
+
+class GameSweeper:
+    """
+    Deletes games that finished more than GC_FINISHED_TTL_MINUTES ago or
+    haven't been written to in GC_IDLE_TTL_HOURS. Games go in chunks of
+    GC_BATCH_SIZE, one transaction each, and ON DELETE CASCADE takes their
+    rows in the other tables with them, so no lock is held for long.
+    """
+
+    def __init__(self, batch_size: int, finished_ttl: timedelta, idle_ttl: timedelta):
+        self.batch_size = batch_size
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run_at = None
+        self.last_run_seconds = None
+        self.reclaimed = dict.fromkeys(RECLAIMED_TABLES, 0)
+
+    def _expired(self):
+        now = datetime.now(timezone.utc)
+        return or_(
+            and_(models.Game.status == "finished", models.Game.updated_at < now - self.finished_ttl),
+            models.Game.updated_at < now - self.idle_ttl,
+        )
+
+    def sweep(self) -> dict:
+        """Deletes every expired game now. Returns the rows reclaimed per table."""
+        start = time.perf_counter()
+        reclaimed = dict.fromkeys(RECLAIMED_TABLES, 0)
+        while True:
+            deleted = self._sweep_chunk()
+            for table, count in deleted.items():
+                reclaimed[table] += count
+            if deleted["games"] < self.batch_size:
+                break
+
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = datetime.now(timezone.utc).isoformat()
+            self.last_run_seconds = round(time.perf_counter() - start, 3)
+            for table, count in reclaimed.items():
+                self.reclaimed[table] += count
+        return reclaimed
+
+    def _sweep_chunk(self) -> dict:
+        db = SessionLocal()
+        try:
+            # SKIP LOCKED keeps sweepers in several workers off each other's chunks
+            games = db.execute(
+                select(models.Game.id, models.Game.code)
+                .where(self._expired())
+                .order_by(models.Game.updated_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not games:
+                return dict.fromkeys(RECLAIMED_TABLES, 0)
+
+            game_ids = [game.id for game in games]
+            round_ids = select(models.Round.id).where(models.Round.game_id.in_(game_ids))
+            counted = {
+                "players": (models.Player, models.Player.game_id.in_(game_ids)),
+                "rounds": (models.Round, models.Round.game_id.in_(game_ids)),
+                "questions": (models.Question, models.Question.game_id.in_(game_ids)),
+                "answers": (models.Answer, models.Answer.round_id.in_(round_ids)),
+                "votes": (models.Vote, models.Vote.round_id.in_(round_ids)),
+            }
+            deleted = {
+                table: db.scalar(select(func.count()).select_from(model).where(criterion))
+                for table, (model, criterion) in counted.items()
+            }
+            deleted["games"] = db.execute(delete(models.Game).where(models.Game.id.in_(game_ids))).rowcount
+            db.commit()
+        finally:
+            db.close()
+
+        for game in games:
+            if game.code:
+                broker.publish(game.code)
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "last_run_at": self.last_run_at,
+                "last_run_seconds": self.last_run_seconds,
+                "reclaimed": dict(self.reclaimed),
+            }
+
+
+sweeper = GameSweeper(
+    settings.GC_BATCH_SIZE,
+    timedelta(minutes=settings.GC_FINISHED_TTL_MINUTES),
+    timedelta(hours=settings.GC_IDLE_TTL_HOURS),
+)
+
+
+async def sweep_periodically():
+    # Started from the app lifespan; the sweep itself runs on a worker thread
+    while True:
+        await asyncio.sleep(settings.GC_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(sweeper.sweep)
+        except Exception:
+            logger.exception("Game sweeper error")
@@ -0,0 +1,101 @@
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import uuid
+from typing import NamedTuple, Optional
+
+from fastapi import Header, HTTPException, Query
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Truncated HMAC-SHA256; 128 bits is plenty for a token that dies with its game
+MAC_BYTES = 16
+
+if settings.PLAYER_TOKEN_SECRET:
+    _secret = settings.PLAYER_TOKEN_SECRET.encode()
+else:
+    _secret = secrets.token_bytes(32)
+    logger.warning("PLAYER_TOKEN_SECRET is unset: player tokens won't survive a restart "
+                   "or be accepted by other processes")
+
+
+class PlayerSession(NamedTuple):
+    game_id: uuid.UUID
+    player_id: uuid.UUID
+    code: str
+
+
+def issue(game_id: uuid.UUID, player_id: uuid.UUID, code: str) -> str:
+    """Signed, stateless token naming the player and the game (and room code) they joined."""
+    payload = game_id.bytes + player_id.bytes + code.encode()
+    return f"{_b64(payload)}.{_b64(_mac(payload))}"
+
+
+def verify(token: str) -> Optional[PlayerSession]:
+    try:
+        payload_part, mac_part = token.split(".")
+        payload, mac = _unb64(payload_part), _unb64(mac_part)
+    except ValueError:
+        return None
+    if len(payload) <= 32 or not hmac.compare_digest(mac, _mac(payload)):
+        return None
+    return PlayerSession(uuid.UUID(bytes=payload[:16]), uuid.UUID(bytes=payload[16:32]), payload[32:].decode())
+
+
+def _mac(payload: bytes) -> bytes:
+    return hmac.new(_secret, payload, hashlib.sha256).digest()[:MAC_BYTES]
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def player_session(code: str, authorization: Optional[str] = Header(None)) -> PlayerSession:
+    """
+    Dependency for the player routes: the session from the "Authorization:
+    Bearer <token>" header that join_game issued. No database access; a token
+    for another room is refused here.
+    """
+    return _session(code, _bearer(authorization))
+
+
+def viewer_session(
+    code: str, authorization: Optional[str] = Header(None), token: Optional[str] = Query(None),
+) -> Optional[PlayerSession]:
+    """
+    Like player_session for the state routes, where a token is optional: None
+    for an anonymous viewer (the host screen). ?token= stands in for the header
+    on the stream, since EventSource can't send one.
+    """
+    if authorization is None and token is None:
+        return None
+    return _session(code, _bearer(authorization) if authorization is not None else token)
+
+
+def header_session(authorization: Optional[str]) -> Optional[PlayerSession]:
+    """The session a bearer Authorization header carries, or None; any room."""
+    token = _bearer(authorization)
+    return verify(token) if token else None
+
+
+def _bearer(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    return token if scheme.lower() == "bearer" else None
+
+
+def _session(code: str, token: Optional[str]) -> PlayerSession:
+    session = verify(token) if token else None
+    if session is None:
+        raise HTTPException(status_code=401, detail="Missing or invalid player token",
+                            headers={"WWW-Authenticate": "Bearer"})
+    if session.code != code:
+        raise HTTPException(status_code=403, detail="Player token is for another room")
+    return session
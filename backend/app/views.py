@@ -0,0 +1,84 @@
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib json gives the same output, slower
+    orjson = None
+    import json
+
+VIEWS = ("host", "player", "phase")
+# Answer authors and votes are secret until the round is revealed
+REVEALED = {"reveal", "leaderboard", "finished"}
+PHASE_FIELDS = (
+    "game_id", "code", "status", "round_number", "questions_per_player", "current_round_id", "state_version",
+)
+LIST_FIELDS = ("players", "answers", "votes")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def loads(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def project(state: dict, view: str, player_id: Optional[str] = None) -> dict:
+    """
+    Shapes a full GameState (as a dict) for one kind of client:
+
+    - host: the big screen. Until the reveal, answers come without their
+      author (so the AI answer can't be told apart) and votes only as
+      vote_count.
+    - player: the host view plus what belongs to player_id: the author of
+      their own answer and their own vote. Without a player_id it is the
+      host view. player_id must come from the caller's token, never from
+      the request, or anyone could unmask the answers one player at a time.
+    - phase: just the phase and the counts, for clients waiting for it to move.
+
+    The unprojected state never leaves the server.
+    """
+    counts = {
+        "player_count": len(state["players"]),
+        "answer_count": len(state["answers"]),
+        "vote_count": len(state["votes"]),
+    }
+    if view == "phase":
+        return {**{field: state[field] for field in PHASE_FIELDS}, **counts}
+
+    if state["status"] in REVEALED:
+        return {**state, **counts}
+    answers = [
+        answer if answer["player_id"] is not None and answer["player_id"] == player_id
+        else {"id": answer["id"], "text": answer["text"]}
+        for answer in state["answers"]
+    ]
+    votes = [vote for vote in state["votes"] if player_id and vote["voter_player_id"] == player_id]
+    return {**state, "answers": answers, "votes": votes, **counts}
+
+
+def delta(base: dict, current: dict) -> dict:
+    """
+    What changed from base to current (two projections of the same view):
+    every scalar field, plus the players/answers/votes added or changed and
+    the ids of those removed. answer_order is sent when the order of the
+    answers changed, since it is reshuffled as answers come in.
+    """
+    out = {key: value for key, value in current.items() if key not in LIST_FIELDS}
+    out["delta"] = True
+    out["since_version"] = base["state_version"]
+    for field in LIST_FIELDS:
+        if field not in current:
+            continue
+        before = {item["id"]: item for item in base.get(field, [])}
+        ids = [item["id"] for item in current[field]]
+        out[field] = [item for item in current[field] if before.get(item["id"]) != item]
+        kept = set(ids)
+        out[f"removed_{field}"] = [item_id for item_id in before if item_id not in kept]
+        if field == "answers" and list(before) != ids:
+            out["answer_order"] = ids
+    return out
@@ -0,0 +1,89 @@
+"""
+Benchmark for game_logic.create_rounds_safe: time and SQL statements to
+create the rounds of a big room, against the old one-flush-per-round loop.
+
+    python -m bench.bench_rounds [players] [questions_per_player]   (from backend/, with the usual .env)
+
+Creates its games in DATABASE_URL and deletes them again.
+"""
+import sys
+import time
+
+from sqlalchemy import event, func, select
+
+from app import models
+from app.db import SessionLocal, engine
+from app.game_logic import create_rounds_safe, interleave_questions, touch
+
+
+def create_rounds_per_row(db, game):
+    # The previous implementation, for comparison
+    questions = db.query(models.Question).filter(models.Question.game_id == game.id).all()
+    created = []
+    for i, q in enumerate(interleave_questions(questions)):
+        new_round = models.Round(game_id=game.id, question_text=q.text, round_index=i + 1)
+        db.add(new_round)
+        db.flush()
+        q.used_in_round_id = new_round.id
+        db.add(q)
+        created.append((new_round.id, q.text))
+    game.status = "answering"
+    game.round_number = 1
+    touch(game)
+    db.add(game)
+    db.commit()
+    return created
+
+
+def _setup(db, player_count: int, questions_per_player: int) -> models.Game:
+    game = models.Game(status="question_submission", questions_per_player=questions_per_player)
+    db.add(game)
+    db.flush()
+    players = [models.Player(game_id=game.id, name=f"p{i}") for i in range(player_count)]
+    db.add_all(players)
+    db.flush()
+    db.add_all(
+        models.Question(game_id=game.id, player_id=p.id, text=f"question {q} from {p.name}?")
+        for p in players for q in range(questions_per_player)
+    )
+    db.commit()
+    return game
+
+
+def run(create, player_count: int, questions_per_player: int, repeat: int = 5) -> tuple[float, int]:
+    """Returns (seconds, SQL statements) per call, averaged over repeat games."""
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    elapsed = 0.0
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            game = _setup(db, player_count, questions_per_player)
+            event.listen(engine, "before_cursor_execute", count)
+            start = time.perf_counter()
+            create(db, game)
+            elapsed += time.perf_counter() - start
+            event.remove(engine, "before_cursor_execute", count)
+
+            unlinked = db.scalar(select(func.count()).select_from(models.Question).where(
+                models.Question.game_id == game.id, models.Question.used_in_round_id.is_(None),
+            ))
+            assert unlinked == 0, f"{unlinked} questions not linked to a round"
+            db.delete(game)
+            db.commit()
+        finally:
+            db.close()
+    return elapsed / repeat, statements // repeat
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    questions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{players} players x {questions} questions = {players * questions} rounds")
+    for name, create in (("per-row flush", create_rounds_per_row), ("bulk", create_rounds_safe)):
+        seconds, statements = run(create, players, questions)
+        print(f"{name:>14}: {seconds * 1000:8.1f} ms, {statements:5} statements")
@@ -0,0 +1,35 @@
+"""
+Benchmark for game_logic.score_round at large player counts.
+
+    python -m bench.bench_scoring [players ...]   (from backend/, with the usual .env)
+"""
+import random
+import sys
+import time
+import uuid
+
+from app.game_logic import score_round
+
+
+def run(player_count: int, repeat: int = 20) -> float:
+    rng = random.Random(player_count)
+    player_ids = [uuid.uuid4() for _ in range(player_count)]
+    answers = {uuid.uuid4(): pid for pid in player_ids}
+    ai_answer_id = uuid.uuid4()
+    answer_ids = list(answers) + [ai_answer_id]
+    players = {pid: (rng.randint(-1000, 5000), rng.randint(0, 5)) for pid in player_ids}
+    votes = []
+    for pid in player_ids:
+        answer_id = rng.choice(answer_ids)
+        votes.append((pid, answer_id, answers.get(answer_id)))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        score_round(votes, ai_answer_id, players)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    counts = [int(n) for n in sys.argv[1:]] or [10, 100, 1_000, 10_000, 100_000]
+    for count in counts:
+        print(f"{count:>8} players: {run(count) * 1000:8.3f} ms/round")
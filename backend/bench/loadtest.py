@@ -0,0 +1,298 @@
+"""
+Load test: N rooms x M players through the full game loop, concurrently.
+
+Each room is created, joined, started and played to the end (questions,
+answers, votes, reveal, leaderboard) while every player polls /state with
+If-None-Match like the frontend's fallback poller. Reports per-endpoint
+latency percentiles, throughput and, when the app runs in-process, the
+number of DB queries and the time spent waiting for a pooled connection.
+
+    python -m bench.loadtest --rooms 200 --players 6
+    python -m bench.loadtest --database sqlite:///bench.db --migrate --rooms 50
+    python -m bench.loadtest --url http://localhost:8000 --rooms 500
+
+In-process runs use AI_PROVIDER=local (offline, deterministic) unless the
+environment says otherwise; --ai-latency adds a sleep to each impostor
+answer to stand in for a real LLM call.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint: str, status: int, seconds: float):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Client:
+    def __init__(self, http: httpx.AsyncClient, recorder: Recorder):
+        self.http = http
+        self.recorder = recorder
+
+    async def request(self, method: str, endpoint: str, path: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.http.request(method, path, **kwargs)
+        self.recorder.add(endpoint, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def post(self, endpoint: str, path: str, body: dict = None, token: str = None) -> dict:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = await self.request("POST", endpoint, path, json=body, headers=headers)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{endpoint} -> {response.status_code} {response.text}")
+        return response.json()
+
+
+class Room:
+    """One game: a host driving the phases and a poller per player."""
+
+    def __init__(self, client: Client, players: int, questions: int, poll_interval: float):
+        self.client = client
+        self.player_count = players
+        self.questions = questions
+        self.poll_interval = poll_interval
+        self.state = None
+        # Each player's own view; only it shows which answer is theirs
+        self.states = {}
+        self.done = asyncio.Event()
+
+    async def poll(self, code: str, player_id: str, token: str):
+        etag = None
+        # Stagger so pollers in a room don't fire in lockstep
+        await asyncio.sleep(random.random() * self.poll_interval)
+        while not self.done.is_set():
+            headers = {"Authorization": f"Bearer {token}"}
+            if etag:
+                headers["If-None-Match"] = etag
+            response = await self.client.request("GET", "GET /state", f"/games/{code}/state", headers=headers)
+            if response.status_code == 200:
+                etag = response.headers.get("etag")
+                self.state = self.states[player_id] = response.json()
+            await asyncio.sleep(self.poll_interval)
+
+    async def wait_for(self, *statuses: str, player_id: str = None, round_number: int = None, timeout: float = 120):
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.states.get(player_id) if player_id else self.state
+            if state and state["status"] in statuses and round_number in (None, state["round_number"]):
+                return state
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"room stuck in {state and state['status']}, expected {statuses}")
+            await asyncio.sleep(self.poll_interval / 4)
+
+    async def vote(self, code: str, player_id: str, token: str, round_number: int):
+        # This player's poller may not have seen the voting phase yet
+        state = await self.wait_for("voting", player_id=player_id, round_number=round_number)
+        # Authors are hidden until the reveal, except on the player's own answer
+        choices = [a["id"] for a in state["answers"] if a.get("player_id") != player_id]
+        await self.client.post("POST /submit-vote", f"/games/{code}/submit-vote",
+                               {"answer_id": random.choice(choices)}, token)
+
+    async def play(self):
+        c = self.client
+        code = (await c.post("POST /create", "/games/create"))["code"]
+        player_ids = []
+        tokens = {}
+        for i in range(self.player_count):
+            joined = await c.post("POST /join", "/games/join", {"name": f"p{i}", "code": code})
+            player_ids.append(joined["player_id"])
+            tokens[joined["player_id"]] = joined["token"]
+        pollers = [asyncio.create_task(self.poll(code, pid, tokens[pid])) for pid in player_ids]
+        try:
+            await c.post("POST /start", f"/games/{code}/start")
+            await c.post("POST /set-question-count", f"/games/{code}/set-question-count", {"count": self.questions})
+            await asyncio.gather(*[
+                c.post("POST /submit-question", f"/games/{code}/submit-question",
+                       {"text": f"question {q} from {i}?"}, tokens[pid])
+                for q in range(self.questions) for i, pid in enumerate(player_ids)
+            ])
+
+            for _ in range(self.player_count * self.questions):
+                await self.wait_for("answering")
+                await asyncio.gather(*[
+                    c.post("POST /submit-answer", f"/games/{code}/submit-answer",
+                           {"text": random.choice(["pizza", "my cat", "never", "tuesday"])}, tokens[pid])
+                    for pid in player_ids
+                ])
+                round_number = (await self.wait_for("voting"))["round_number"]
+                await asyncio.gather(*[self.vote(code, pid, tokens[pid], round_number) for pid in player_ids])
+                await self.wait_for("reveal")
+                status = (await c.post("POST /next-round", f"/games/{code}/next-round"))["status"]
+                if status == "leaderboard":
+                    await c.post("POST /next-round", f"/games/{code}/next-round")
+                    # Let the pollers see the new round before waiting on it
+                    await self.wait_for("answering")
+            await self.wait_for("finished")
+        finally:
+            self.done.set()
+            await asyncio.gather(*pollers)
+
+
+class DBProbe:
+    """Counts queries and times pool checkouts on the app's engines (in-process only)."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.queries = 0
+        self.waits = []
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_query)
+            pool = engine.pool
+            pool._do_get = self._timed(pool._do_get)
+
+    def _on_query(self, *args):
+        self.queries += 1
+
+    def _timed(self, do_get):
+        def timed_do_get():
+            start = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                self.waits.append(time.perf_counter() - start)
+        return timed_do_get
+
+
+def report(recorder: Recorder, elapsed: float, rooms_done: int, failures: list, probe):
+    print(f"\n{'endpoint':<26}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  status")
+    for endpoint in sorted(recorder.latencies):
+        values = recorder.latencies[endpoint]
+        statuses = " ".join(f"{s}x{n}" for s, n in sorted(recorder.statuses[endpoint].items()))
+        print(f"{endpoint:<26}{len(values):>8}"
+              + "".join(f"{percentile(values, q) * 1000:>10.1f}" for q in (0.5, 0.95, 0.99))
+              + f"{max(values) * 1000:>10.1f}  {statuses}")
+    total = recorder.total()
+    print(f"\n{rooms_done} rooms finished, {len(failures)} failed, in {elapsed:.1f}s")
+    print(f"{total} requests, {total / elapsed:.0f} req/s")
+    for failure in failures[:5]:
+        print(f"  failure: {failure}")
+    if probe:
+        print(f"{probe.queries} DB queries ({probe.queries / max(total, 1):.2f} per request)")
+        if probe.waits:
+            print(f"{len(probe.waits)} pool checkouts, wait p50 {percentile(probe.waits, 0.5) * 1000:.2f} ms, "
+                  f"p99 {percentile(probe.waits, 0.99) * 1000:.2f} ms, total {sum(probe.waits):.2f}s")
+
+
+async def run(args):
+    recorder = Recorder()
+    probe = None
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    timeout = httpx.Timeout(60.0)
+
+    if args.url:
+        http = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+        lifespan = None
+    else:
+        if args.database:
+            os.environ["DATABASE_URL"] = args.database
+        os.environ.setdefault("AI_PROVIDER", "local")
+        if args.migrate:
+            from alembic import command
+            from alembic.config import Config
+
+            command.upgrade(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
+
+        from app import jobs
+        from app.db import async_engine, engine
+        from app.main import app
+
+        if args.ai_latency:
+            generate = jobs.generate_impostor_answer
+
+            def slow_generate(*a, **kw):
+                time.sleep(args.ai_latency)
+                return generate(*a, **kw)
+            jobs.generate_impostor_answer = slow_generate
+
+        probe = DBProbe([engine, async_engine.sync_engine])
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    client = Client(http, recorder)
+    failures = []
+    rooms_done = 0
+    semaphore = asyncio.Semaphore(args.concurrency or args.rooms)
+
+    async def one_room():
+        nonlocal rooms_done
+        async with semaphore:
+            try:
+                await Room(client, args.players, args.questions, args.poll_interval).play()
+                rooms_done += 1
+            except Exception as e:
+                failures.append(repr(e))
+
+    if lifespan:
+        await lifespan.__aenter__()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[one_room() for _ in range(args.rooms)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await http.aclose()
+        if lifespan:
+            await lifespan.__aexit__(None, None, None)
+
+    report(recorder, elapsed, rooms_done, failures, probe)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "elapsed_seconds": elapsed,
+                "rooms": rooms_done,
+                "failures": failures,
+                "requests": recorder.total(),
+                "endpoints": {
+                    endpoint: {
+                        "count": len(values),
+                        **{f"p{int(q * 100)}_ms": percentile(values, q) * 1000 for q in (0.5, 0.95, 0.99)},
+                        "statuses": dict(recorder.statuses[endpoint]),
+                    }
+                    for endpoint, values in recorder.latencies.items()
+                },
+                "db_queries": probe.queries if probe else None,
+                "pool_wait_seconds": sum(probe.waits) if probe else None,
+            }, f, indent=2)
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=1, help="questions per player (rounds = players x this)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between each player's /state polls")
+    parser.add_argument("--concurrency", type=int, default=0, help="rooms in flight at once (default: all)")
+    parser.add_argument("--url", help="load an already running server instead of the app in-process")
+    parser.add_argument("--database", help="DATABASE_URL for the in-process app")
+    parser.add_argument("--migrate", action="store_true", help="run alembic upgrade head first")
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="seconds added to each impostor answer")
+    parser.add_argument("--max-connections", type=int, default=500, help="HTTP connections for --url")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
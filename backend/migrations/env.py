@@ -0,0 +1,55 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import NUMERIC, Table, create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.pool import NullPool
+
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.db import Base, engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+@event.listens_for(Table, "column_reflect")
+def _reflect_sqlite_uuid(inspector, table, column_info):
+    # SQLite reflects the UUID columns as NUMERIC (the schema has no other
+    # NUMERIC columns); batch mode would recreate them with numeric affinity
+    if inspector.dialect.name == "sqlite" and isinstance(column_info["type"], NUMERIC):
+        column_info["type"] = UUID(as_uuid=True)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # A separate, unpooled engine: the app's engine turns SQLite foreign keys
+    # on, and batch mode's drop-and-recreate of a table must not cascade
+    migration_engine = create_engine(engine.url, poolclass=NullPool)
+    with migration_engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't ALTER constraints in place; batch mode recreates the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,80 @@
+"""initial schema
+
+The tables as Base.metadata.create_all used to create them. Databases that
+were created that way should be stamped with this revision
+(`alembic stamp 0001`) and then upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "games",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("code", sa.String(10), nullable=False, unique=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("round_number", sa.Integer(), nullable=False),
+        sa.Column("questions_per_player", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "players",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("game_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("games.id"), nullable=False),
+        sa.Column("name", sa.String(64), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("streak", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "rounds",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("game_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("games.id"), nullable=False),
+        sa.Column("question_text", sa.Text(), nullable=False),
+        # FK to answers is added below, once that table exists
+        sa.Column("ai_answer_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("round_index", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "questions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("game_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("games.id"), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("used_in_round_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("rounds.id"), nullable=True),
+    )
+    op.create_table(
+        "answers",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("round_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("rounds.id"), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+    )
+    op.create_table(
+        "votes",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("round_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("rounds.id"), nullable=False),
+        sa.Column("voter_player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("answer_id_voted_for", postgresql.UUID(as_uuid=True), sa.ForeignKey("answers.id"), nullable=False),
+    )
+    if op.get_context().dialect.name != "sqlite":
+        op.create_foreign_key("fk_round_ai_answer", "rounds", "answers", ["ai_answer_id"], ["id"])
+
+
+def downgrade():
+    if op.get_context().dialect.name != "sqlite":
+        op.drop_constraint("fk_round_ai_answer", "rounds", type_="foreignkey")
+    for table in ["votes", "answers", "questions", "rounds", "players", "games"]:
+        op.drop_table(table)
@@ -0,0 +1,31 @@
+"""state version, AI drafts and idempotency keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("games", sa.Column("state_version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("rounds", sa.Column("ai_draft_answer", sa.Text(), nullable=True))
+    for table in ["questions", "answers", "votes"]:
+        op.add_column(table, sa.Column("idempotency_key", sa.String(64), nullable=True))
+
+
+def downgrade():
+    for table in ["questions", "answers", "votes"]:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("idempotency_key")
+    with op.batch_alter_table("rounds") as batch:
+        batch.drop_column("ai_draft_answer")
+    with op.batch_alter_table("games") as batch:
+        batch.drop_column("state_version")
@@ -0,0 +1,33 @@
+"""composite indexes for the hot lookup paths
+
+Unique indexes double as the "one answer / one vote per player per round",
+"one name per game" and "one round per index" constraints. Creating them
+fails if existing rows already violate them.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("uq_players_game_id_name", "players", ["game_id", "name"], unique=True)
+    op.create_index("uq_rounds_game_id_round_index", "rounds", ["game_id", "round_index"], unique=True)
+    op.create_index("ix_questions_game_id_player_id", "questions", ["game_id", "player_id"])
+    op.create_index("uq_answers_round_id_player_id", "answers", ["round_id", "player_id"], unique=True)
+    op.create_index("uq_votes_round_id_voter_player_id", "votes", ["round_id", "voter_player_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("uq_votes_round_id_voter_player_id", "votes")
+    op.drop_index("uq_answers_round_id_player_id", "answers")
+    op.drop_index("ix_questions_game_id_player_id", "questions")
+    op.drop_index("uq_rounds_game_id_round_index", "rounds")
+    op.drop_index("uq_players_game_id_name", "players")
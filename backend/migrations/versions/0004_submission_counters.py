@@ -0,0 +1,45 @@
+"""denormalized player/question/answer/vote counters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COUNTERS = {
+    "games": ["player_count", "question_count"],
+    "rounds": ["answer_count", "vote_count"],
+}
+
+
+def upgrade():
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill games already in progress
+    op.execute("""
+        UPDATE games SET
+            player_count = (SELECT count(*) FROM players WHERE players.game_id = games.id),
+            question_count = (SELECT count(*) FROM questions WHERE questions.game_id = games.id)
+    """)
+    op.execute("""
+        UPDATE rounds SET
+            answer_count = (SELECT count(*) FROM answers
+                            WHERE answers.round_id = rounds.id AND answers.player_id IS NOT NULL),
+            vote_count = (SELECT count(*) FROM votes WHERE votes.round_id = rounds.id)
+    """)
+
+
+def downgrade():
+    for table, columns in COUNTERS.items():
+        with op.batch_alter_table(table) as batch:
+            for column in columns:
+                batch.drop_column(column)
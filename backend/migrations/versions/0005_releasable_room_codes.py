@@ -0,0 +1,27 @@
+"""allow games to release their room code
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("games") as batch:
+        batch.alter_column("code", existing_type=sa.String(10), nullable=True)
+
+
+def downgrade():
+    # Released games have no code to restore; give them one that can't
+    # collide with the pool
+    op.execute("UPDATE games SET code = '~' || substr(CAST(id AS VARCHAR), 1, 9) WHERE code IS NULL")
+    with op.batch_alter_table("games") as batch:
+        batch.alter_column("code", existing_type=sa.String(10), nullable=False)
@@ -0,0 +1,83 @@
+"""ON DELETE CASCADE foreign keys and games.updated_at
+
+Deleting a game row now removes its players, rounds, questions, answers and
+votes in the same statement. Foreign key columns that don't lead an existing
+index get one, so each cascaded delete is an index lookup per child table.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# table -> [(column, referenced table, ON DELETE action)]
+FOREIGN_KEYS = {
+    "players": [("game_id", "games", "CASCADE")],
+    "rounds": [("game_id", "games", "CASCADE")],
+    "questions": [
+        ("game_id", "games", "CASCADE"),
+        ("player_id", "players", "CASCADE"),
+        ("used_in_round_id", "rounds", "SET NULL"),
+    ],
+    "answers": [("round_id", "rounds", "CASCADE"), ("player_id", "players", "CASCADE")],
+    "votes": [
+        ("round_id", "rounds", "CASCADE"),
+        ("voter_player_id", "players", "CASCADE"),
+        ("answer_id_voted_for", "answers", "CASCADE"),
+    ],
+}
+
+# Referencing columns not covered by 0001/0003's indexes: table -> columns
+CASCADE_INDEXES = {
+    "rounds": ["ai_answer_id"],
+    "questions": ["player_id", "used_in_round_id"],
+    "answers": ["player_id"],
+    "votes": ["voter_player_id", "answer_id_voted_for"],
+}
+
+# Postgres' default names for the constraints 0001 created; SQLite's are
+# unnamed, so batch mode gets them named the same way on reflection
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_foreign_keys(ondelete: bool):
+    for table, keys in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            for column, referent, action in keys:
+                name = f"{table}_{column}_fkey"
+                batch.drop_constraint(name, type_="foreignkey")
+                batch.create_foreign_key(name, referent, [column], ["id"], ondelete=action if ondelete else None)
+
+    if op.get_context().dialect.name != "sqlite":
+        op.drop_constraint("fk_round_ai_answer", "rounds", type_="foreignkey")
+        op.create_foreign_key(
+            "fk_round_ai_answer", "rounds", "answers", ["ai_answer_id"], ["id"],
+            ondelete="SET NULL" if ondelete else None,
+        )
+
+
+def upgrade():
+    op.add_column("games", sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()))
+    op.execute("UPDATE games SET updated_at = created_at")
+    op.create_index("ix_games_updated_at", "games", ["updated_at"])
+    _replace_foreign_keys(ondelete=True)
+    for table, columns in CASCADE_INDEXES.items():
+        for column in columns:
+            op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade():
+    for table, columns in CASCADE_INDEXES.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}", table)
+    _replace_foreign_keys(ondelete=False)
+    op.drop_index("ix_games_updated_at", "games")
+    with op.batch_alter_table("games") as batch:
+        batch.drop_column("updated_at")
@@ -1,11 +1,12 @@
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import text
-from app.db import engine, Base
-from app.models import *  # Import all models to ensure they are registered
+from app.db import engine
 
 print("Dropping all tables via raw SQL...")
 with engine.connect() as conn:
     # Order matters less with CASCADE, but good to be thorough
-    tables = ["votes", "answers", "questions", "rounds", "players", "games"]
+    tables = ["votes", "answers", "questions", "rounds", "players", "games", "alembic_version"]
     for table in tables:
         print(f"Dropping {table}...")
         try:
@@ -17,5 +18,5 @@ with engine.connect() as conn:
 print("Tables dropped.")
 
 print("Creating all tables...")
-Base.metadata.create_all(bind=engine)
+command.upgrade(Config("alembic.ini"), "head")
 print("Tables created successfully.")
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The app reads its settings on import: point it at a scratch SQLite database
+# and the offline AI before any test module imports it
+_scratch = tempfile.mkdtemp(prefix="partygame-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/test.db"
+os.environ["AI_PROVIDER"] = "local"
+os.environ["LIVE_JOURNAL_PATH"] = f"{_scratch}/live-journal.jsonl"
+os.environ.setdefault("PLAYER_TOKEN_SECRET", "test-secret")
+
+
+@pytest.fixture(scope="session", params=["db", "memory"])
+def client(request):
+    """A TestClient on the app, once per game engine."""
+    from app.config import settings
+    from app.db import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(engine)
+    settings.GAME_ENGINE, engine_before = request.param, settings.GAME_ENGINE
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        settings.GAME_ENGINE = engine_before
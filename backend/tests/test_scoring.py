@@ -0,0 +1,56 @@
+import uuid
+
+from app.game_logic import score_round
+
+AI_ANSWER = uuid.uuid4()
+HUMAN_ANSWER = uuid.uuid4()
+VOTER = uuid.uuid4()
+AUTHOR = uuid.uuid4()
+
+
+def test_correct_vote_adds_the_streak_bonus():
+    players = {VOTER: (1000, 2), AUTHOR: (0, 0)}
+
+    # Third correct guess in a row: 500 + (3-1)*50
+    assert score_round([(VOTER, AI_ANSWER, None)], AI_ANSWER, players) == {VOTER: (1600, 3)}
+
+
+def test_first_correct_vote_has_no_bonus():
+    assert score_round([(VOTER, AI_ANSWER, None)], AI_ANSWER, {VOTER: (0, 0)}) == {VOTER: (500, 1)}
+
+
+def test_wrong_vote_costs_250_resets_the_streak_and_pays_the_author():
+    players = {VOTER: (1000, 4), AUTHOR: (300, 2)}
+
+    changed = score_round([(VOTER, HUMAN_ANSWER, AUTHOR)], AI_ANSWER, players)
+
+    assert changed == {VOTER: (750, 0), AUTHOR: (550, 2)}
+
+
+def test_author_is_paid_once_per_fooled_voter():
+    other = uuid.uuid4()
+    players = {VOTER: (0, 0), other: (0, 0), AUTHOR: (0, 0)}
+    votes = [(VOTER, HUMAN_ANSWER, AUTHOR), (other, HUMAN_ANSWER, AUTHOR)]
+
+    assert score_round(votes, AI_ANSWER, players)[AUTHOR] == (500, 0)
+
+
+def test_vote_when_the_round_has_no_ai_answer_is_wrong():
+    # Without a stored AI answer no vote can be correct, and an answer
+    # without an author pays nobody
+    players = {VOTER: (1000, 1), AUTHOR: (0, 0)}
+
+    assert score_round([(VOTER, AI_ANSWER, None)], None, players) == {VOTER: (750, 0)}
+
+
+def test_unknown_voter_is_ignored():
+    players = {VOTER: (1000, 1), AUTHOR: (0, 0)}
+    votes = [(uuid.uuid4(), HUMAN_ANSWER, AUTHOR), (uuid.uuid4(), AI_ANSWER, None)]
+
+    assert score_round(votes, AI_ANSWER, players) == {}
+
+
+def test_unchanged_players_are_left_out():
+    players = {VOTER: (0, 0), AUTHOR: (0, 0), uuid.uuid4(): (10, 1)}
+
+    assert set(score_round([(VOTER, AI_ANSWER, None)], AI_ANSWER, players)) == {VOTER}
@@ -0,0 +1,96 @@
+from app import models
+from app.config import settings
+from app.db import SessionLocal
+from app.live import live
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _writing_room(client):
+    """A two-player room taking questions: (code, {name: join response})."""
+    code = client.post("/games/create").json()["code"]
+    players = {name: client.post("/games/join", json={"name": name, "code": code}).json() for name in ("ada", "bob")}
+    client.post(f"/games/{code}/start")
+    client.post(f"/games/{code}/set-question-count", json={"count": 2})
+    return code, players
+
+
+def _submit(client, code, headers=None, **body):
+    return client.post(f"/games/{code}/submit-question", json={"text": "why?", **body}, headers=headers or {})
+
+
+def _recycle(code):
+    # What CodeAllocator does to a stale game: release its code to a new game
+    db = SessionLocal()
+    try:
+        old = db.query(models.Game).filter_by(code=code).one()
+        old.code = None
+        db.flush()
+        game = models.Game(code=code)
+        db.add(game)
+        db.commit()
+        db.refresh(game)
+    finally:
+        db.close()
+    if settings.GAME_ENGINE == "memory":
+        live.remove(code)
+        live.add(game)
+
+
+def test_missing_or_forged_token_is_401(client):
+    code, players = _writing_room(client)
+    token = players["ada"]["token"]
+    forged = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+
+    for headers in ({}, _auth("junk"), _auth(forged), {"Authorization": f"Basic {token}"}):
+        response = _submit(client, code, headers)
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_token_for_another_room_is_403(client):
+    code, _ = _writing_room(client)
+    _, other_players = _writing_room(client)
+
+    assert _submit(client, code, _auth(other_players["ada"]["token"])).status_code == 403
+
+
+def test_body_player_id_must_match_the_token(client):
+    code, players = _writing_room(client)
+    ada, bob = players["ada"], players["bob"]
+
+    assert _submit(client, code, _auth(ada["token"]), player_id=bob["player_id"]).status_code == 403
+    assert _submit(client, code, _auth(ada["token"]), player_id=ada["player_id"]).status_code == 200
+
+
+def test_token_for_a_recycled_code_is_404(client):
+    code, players = _writing_room(client)
+    _recycle(code)
+
+    assert _submit(client, code, _auth(players["ada"]["token"])).status_code == 404
+
+
+def test_rejoin_under_a_taken_name_needs_that_players_token(client):
+    code, players = _writing_room(client)
+    ada, bob = players["ada"], players["bob"]
+
+    def join(headers=None):
+        return client.post("/games/join", json={"name": "ada", "code": code}, headers=headers or {})
+
+    assert join().status_code == 409
+    assert join(_auth(bob["token"])).status_code == 409
+    rejoined = join(_auth(ada["token"]))
+    assert rejoined.status_code == 200
+    assert rejoined.json()["player_id"] == ada["player_id"]
+
+
+def test_taken_name_in_the_lobby_is_409(client):
+    code = client.post("/games/create").json()["code"]
+    first = client.post("/games/join", json={"name": "ada", "code": code})
+    assert first.status_code == 200
+
+    second = client.post("/games/join", json={"name": "ada", "code": code})
+    assert second.status_code == 409
+    assert "token" not in second.json()
@@ -0,0 +1,113 @@
+from app.state_cache import HISTORY_VERSIONS, StateCache
+from app.views import delta, dumps, loads, project
+
+ADA, BOB = "player-ada", "player-bob"
+
+
+def _state(status, version=5):
+    """A full GameState dict for a two-player round: ada, bob and the AI answered, ada voted."""
+    return {
+        "game_id": "game", "code": "1234", "status": status, "round_number": 1,
+        "questions_per_player": 1, "current_round_id": "round", "state_version": version,
+        "players": [{"id": ADA, "name": "ada", "score": 0}, {"id": BOB, "name": "bob", "score": 0}],
+        "answers": [
+            {"id": "a-ada", "text": "ada's", "player_id": ADA},
+            {"id": "a-ai", "text": "the AI's", "player_id": None},
+            {"id": "a-bob", "text": "bob's", "player_id": BOB},
+        ],
+        "votes": [{"id": "v-ada", "voter_player_id": ADA, "answer_id": "a-bob"}],
+    }
+
+
+def test_host_and_anonymous_player_views_hide_authors_and_votes_until_the_reveal():
+    state = _state("voting")
+    for view in ("host", "player"):
+        projected = project(state, view)
+        assert all(set(answer) == {"id", "text"} for answer in projected["answers"])
+        assert projected["votes"] == []
+        assert (projected["answer_count"], projected["vote_count"]) == (3, 1)
+
+
+def test_authors_and_votes_are_shown_from_the_reveal_on():
+    for status in ("reveal", "leaderboard", "finished"):
+        state = _state(status)
+        for view in ("host", "player"):
+            projected = project(state, view)
+            assert projected["answers"] == state["answers"]
+            assert projected["votes"] == state["votes"]
+
+
+def test_player_view_shows_only_the_players_own_answer_author_and_vote():
+    state = _state("voting")
+
+    ada = project(state, "player", ADA)
+    assert [answer.get("player_id") for answer in ada["answers"]] == [ADA, None, None]
+    assert ada["votes"] == state["votes"]
+
+    bob = project(state, "player", BOB)
+    assert [answer.get("player_id") for answer in bob["answers"]] == [None, None, BOB]
+    assert bob["votes"] == []
+
+
+def test_phase_view_only_has_the_phase_and_counts():
+    projected = project(_state("voting"), "phase")
+    assert "answers" not in projected and "players" not in projected
+    assert projected["status"] == "voting"
+    assert projected["vote_count"] == 1
+
+
+def test_delta_sends_changed_and_removed_items_and_the_new_answer_order():
+    base = project(_state("voting", version=5), "host")
+    current_state = _state("voting", version=6)
+    current_state["players"] = [{"id": ADA, "name": "ada", "score": 0}]
+    current_state["answers"].reverse()
+    current_state["answers"].append({"id": "a-new", "text": "new", "player_id": None})
+    current = project(current_state, "host")
+
+    changed = delta(base, current)
+
+    assert changed["delta"] is True
+    assert (changed["since_version"], changed["state_version"]) == (5, 6)
+    assert changed["players"] == [] and changed["removed_players"] == [BOB]
+    assert changed["answers"] == [{"id": "a-new", "text": "new"}]
+    assert changed["removed_answers"] == []
+    assert changed["answer_order"] == ["a-bob", "a-ai", "a-ada", "a-new"]
+
+
+def test_delta_without_reordering_has_no_answer_order():
+    base = project(_state("voting", version=5), "host")
+    current = project(_state("voting", version=6), "host")
+
+    changed = delta(base, current)
+
+    assert "answer_order" not in changed
+    assert changed["answers"] == changed["players"] == changed["votes"] == []
+
+
+def test_state_cache_remembers_the_last_full_states():
+    cache = StateCache(max_rooms=4)
+    for version in range(HISTORY_VERSIONS + 2):
+        cache.put("1234", f"game.{version}", dumps(_state("voting", version)))
+        cache.put("1234", f"game.{version}", b"{}", "host::")
+    cache.invalidate("1234")
+
+    assert cache.past("1234", "game.0") is None and cache.past("1234", "game.1") is None
+    assert loads(cache.past("1234", "game.2"))["state_version"] == 2
+    assert loads(cache.past("1234", f"game.{HISTORY_VERSIONS + 1}"))["state_version"] == HISTORY_VERSIONS + 1
+    assert cache.past("9999", "game.2") is None
+
+
+def test_since_version_returns_a_delta_only_while_the_base_is_held(client):
+    code = client.post("/games/create").json()["code"]
+    client.post("/games/join", json={"name": "ada", "code": code})
+    base = client.get(f"/games/{code}/state").json()
+    client.post("/games/join", json={"name": "bob", "code": code})
+
+    changed = client.get(f"/games/{code}/state", params={"since_version": base["state_version"]}).json()
+    assert changed["delta"] is True
+    assert [player["name"] for player in changed["players"]] == ["bob"]
+    assert changed["removed_players"] == []
+
+    whole = client.get(f"/games/{code}/state", params={"since_version": base["state_version"] + 1000}).json()
+    assert "delta" not in whole
+    assert [player["name"] for player in whole["players"]] == ["ada", "bob"]
@@ -0,0 +1,68 @@
+import time
+import uuid
+
+
+def _voting_room(client):
+    """A two-player room in its first voting phase: (code, {player_id: token})."""
+    code = client.post("/games/create").json()["code"]
+    players = {}
+    for name in ("ada", "bob"):
+        joined = client.post("/games/join", json={"name": name, "code": code}).json()
+        players[joined["player_id"]] = joined["token"]
+    client.post(f"/games/{code}/start")
+    client.post(f"/games/{code}/set-question-count", json={"count": 1})
+    for step in ("submit-question", "submit-answer"):
+        for i, token in enumerate(players.values()):
+            response = client.post(f"/games/{code}/{step}", json={"text": f"{step} {i}"},
+                                   headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 200, response.text
+    # The impostor answer is generated in the background
+    deadline = time.monotonic() + 10
+    while client.get(f"/games/{code}/state").json()["status"] != "voting":
+        assert time.monotonic() < deadline, "room never reached voting"
+        time.sleep(0.05)
+    return code, players
+
+
+def _vote(client, code, token, answer_id):
+    return client.post(f"/games/{code}/submit-vote", json={"answer_id": str(answer_id)},
+                       headers={"Authorization": f"Bearer {token}"})
+
+
+def test_vote_for_answer_outside_the_round_is_rejected(client):
+    code, players = _voting_room(client)
+    other_code, other_players = _voting_room(client)
+    token = next(iter(players.values()))
+    other_answer = client.get(f"/games/{other_code}/state").json()["answers"][0]["id"]
+
+    for answer_id in (uuid.uuid4(), other_answer):
+        response = _vote(client, code, token, answer_id)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Answer not found in this round"
+
+
+def test_vote_for_own_answer_is_rejected_and_others_accepted(client):
+    code, players = _voting_room(client)
+    player_id, token = next(iter(players.items()))
+    answers = client.get(f"/games/{code}/state", headers={"Authorization": f"Bearer {token}"}).json()["answers"]
+    own = next(a["id"] for a in answers if a.get("player_id") == player_id)
+    other = next(a["id"] for a in answers if a["id"] != own)
+
+    response = _vote(client, code, token, own)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "You cannot vote for your own answer"
+    assert _vote(client, code, token, other).status_code == 200
+
+
+def test_replayed_vote_reports_the_state_version(client):
+    code, players = _voting_room(client)
+    player_id, token = next(iter(players.items()))
+    answers = client.get(f"/games/{code}/state", headers={"Authorization": f"Bearer {token}"}).json()["answers"]
+    other = next(a["id"] for a in answers if a.get("player_id") != player_id)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post(f"/games/{code}/submit-vote", json={"answer_id": other}, headers=headers)
+    replay = client.post(f"/games/{code}/submit-vote", json={"answer_id": other}, headers=headers)
+    assert first.status_code == replay.status_code == 200
+    if "X-State-Version" in first.headers:  # only the DB engine reports versions
+        assert int(replay.headers["X-State-Version"]) >= int(first.headers["X-State-Version"])
@@ -8,7 +8,9 @@ export type Player = {
 
 export type Answer = {
   id: string;
-  player_id: string | null;
+  // Left out until the reveal in the host and player views (except on the
+  // player's own answer); null for the AI's answer
+  player_id?: string | null;
   text: string;
 };
 
@@ -29,8 +31,32 @@ export type GameState = {
   answers: Answer[];
   questions_per_player: number;
   votes?: Vote[];
+  state_version?: number;
+  vote_count?: number;
 };
 
+// Both hide answer authors and other players' votes until the reveal;
+// "player" also shows the player's own, identified by their token
+export type StateView = "host" | "player";
+
+// X-State-Version of this client's last write per room, sent back on reads
+// as min_version so a state served from a lagging read replica includes it
+const lastWritten = new Map<string, number>();
+
+function noteWrite(code: string, res: Response) {
+  const version = Number(res.headers.get("X-State-Version"));
+  if (version > (lastWritten.get(code) ?? 0)) lastWritten.set(code, version);
+}
+
+function stateQuery(code: string, view?: StateView) {
+  const params = new URLSearchParams();
+  if (view) params.set("view", view);
+  const written = lastWritten.get(code);
+  if (written) params.set("min_version", String(written));
+  const query = params.toString();
+  return query ? `?${query}` : "";
+}
+
 export async function createGame() {
   const res = await fetch(`${API_BASE_URL}/games/create`, {
     method: "POST",
@@ -42,19 +68,51 @@ export async function createGame() {
 export async function joinGame(name: string, code: string) {
   const res = await fetch(`${API_BASE_URL}/games/join`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    // A stored token lets this player rejoin under their name; without it a
+    // taken name is refused
+    headers: playerToken() ? playerHeaders() : { "Content-Type": "application/json" },
     body: JSON.stringify({ name, code }),
   });
+  if (res.status === 409) throw new Error("That name is already taken in this game");
   if (!res.ok) throw new Error("Failed to join game");
-  return res.json() as Promise<{ player_id: string; game_id: string; code: string }>;
+  noteWrite(code, res);
+  return res.json() as Promise<{ player_id: string; game_id: string; code: string; token: string }>;
+}
+
+// The submit routes (and the player state view) identify the player by the
+// token join returned
+function playerToken() {
+  return sessionStorage.getItem("player_token") ?? "";
 }
 
-export async function fetchGameState(code: string) {
-  const res = await fetch(`${API_BASE_URL}/games/${code}/state`);
+function playerHeaders() {
+  return {
+    "Content-Type": "application/json",
+    Authorization: `Bearer ${playerToken()}`,
+  };
+}
+
+export async function fetchGameState(code: string, view?: StateView) {
+  // no-cache makes the browser revalidate with If-None-Match, so an unchanged
+  // state comes back as a cheap 304 served from the HTTP cache
+  const token = view === "player" ? playerToken() : "";
+  const headers: Record<string, string> = token ? { Authorization: `Bearer ${token}` } : {};
+  const res = await fetch(`${API_BASE_URL}/games/${code}/state${stateQuery(code, view)}`, {
+    cache: "no-cache",
+    headers,
+  });
   if (!res.ok) throw new Error("Failed to fetch game state");
   return res.json() as Promise<GameState>;
 }
 
+export function gameStateStreamUrl(code: string, view?: StateView) {
+  const url = `${API_BASE_URL}/games/${code}/stream${stateQuery(code, view)}`;
+  const token = view === "player" ? playerToken() : "";
+  if (!token) return url;
+  // EventSource can't send an Authorization header
+  return `${url}${url.includes("?") ? "&" : "?"}token=${encodeURIComponent(token)}`;
+}
+
 export async function startGame(code: string) {
   const res = await fetch(`${API_BASE_URL}/games/${code}/start`, {
     method: "POST",
@@ -63,6 +121,7 @@ export async function startGame(code: string) {
     const error = await res.json();
     throw new Error(error.detail || "Failed to start game");
   }
+  noteWrite(code, res);
   return res.json();
 }
 
@@ -73,45 +132,49 @@ export async function setQuestionCount(code: string, count: number) {
     body: JSON.stringify({ count }),
   });
   if (!res.ok) throw new Error("Failed to set question count");
+  noteWrite(code, res);
   return res.json();
 }
 
 export async function submitQuestion(code: string, playerId: string, text: string) {
   const res = await fetch(`${API_BASE_URL}/games/${code}/submit-question`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: playerHeaders(),
     body: JSON.stringify({ player_id: playerId, text }),
   });
   if (!res.ok) {
     const error = await res.json();
     throw new Error(error.detail || "Failed to submit question");
   }
+  noteWrite(code, res);
   return res.json();
 }
 
 export async function submitAnswer(code: string, playerId: string, text: string) {
   const res = await fetch(`${API_BASE_URL}/games/${code}/submit-answer`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: playerHeaders(),
     body: JSON.stringify({ player_id: playerId, text }),
   });
   if (!res.ok) {
     const error = await res.json();
     throw new Error(error.detail || "Failed to submit answer");
   }
+  noteWrite(code, res);
   return res.json();
 }
 
 export async function submitVote(code: string, playerId: string, answerId: string) {
   const res = await fetch(`${API_BASE_URL}/games/${code}/submit-vote`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: playerHeaders(),
     body: JSON.stringify({ player_id: playerId, answer_id: answerId }),
   });
   if (!res.ok) {
     const error = await res.json();
     throw new Error(error.detail || "Failed to submit vote");
   }
+  noteWrite(code, res);
   return res.json();
 }
 
@@ -123,6 +186,7 @@ export async function nextRound(code: string) {
     const error = await res.json();
     throw new Error(error.detail || "Failed to start next round");
   }
+  noteWrite(code, res);
   return res.json();
 }
 
@@ -1,8 +1,8 @@
 import { useEffect, useState } from "react";
-import { fetchGameState } from "../api/client";
-import type { GameState } from "../api/client";
+import { fetchGameState, gameStateStreamUrl } from "../api/client";
+import type { GameState, StateView } from "../api/client";
 
-export function useGamePolling(code: string | null, intervalMs = 1500) {
+export function useGamePolling(code: string | null, view?: StateView, intervalMs = 1500) {
   const [state, setState] = useState<GameState | null>(null);
   const [error, setError] = useState<string | null>(null);
 
@@ -11,10 +11,11 @@ export function useGamePolling(code: string | null, intervalMs = 1500) {
 
     let isCancelled = false;
     let timer: number | undefined;
+    let source: EventSource | undefined;
 
     const tick = async () => {
       try {
-        const data = await fetchGameState(code);
+        const data = await fetchGameState(code, view);
         if (!isCancelled) {
           setState(data);
           setError(null);
@@ -28,14 +29,33 @@ export function useGamePolling(code: string | null, intervalMs = 1500) {
       }
     };
 
-    tick();
+    // Prefer the server-pushed stream; fall back to polling if it can't be used
+    if (typeof EventSource !== "undefined") {
+      source = new EventSource(gameStateStreamUrl(code, view));
+      source.onmessage = (event) => {
+        if (isCancelled) return;
+        setState(JSON.parse(event.data));
+        setError(null);
+      };
+      source.addEventListener("deleted", () => {
+        if (!isCancelled) setError("Game not found");
+        source?.close();
+      });
+      source.onerror = () => {
+        source?.close();
+        source = undefined;
+        if (!isCancelled && !timer) tick();
+      };
+    } else {
+      tick();
+    }
 
     return () => {
       isCancelled = true;
+      source?.close();
       if (timer) clearTimeout(timer);
     };
-  }, [code, intervalMs]);
+  }, [code, view, intervalMs]);
 
   return { state, error };
 }
-
@@ -28,11 +28,12 @@ const HomeJoinPage = () => {
     try {
       const res = await joinGame(name, code);
       sessionStorage.setItem("player_id", res.player_id);
+      sessionStorage.setItem("player_token", res.token);
       sessionStorage.setItem("game_code", res.code);
       navigate(`/game/${res.code}`);
     } catch (e) {
       console.error(e);
-      alert("Failed to join game");
+      alert(e instanceof Error ? e.message : "Failed to join game");
     } finally {
       setLoading(false);
     }
@@ -31,7 +31,7 @@ function useWindowSize() {
 const HostGamePage = () => {
   const { code } = useParams<{ code: string }>();
   const navigate = useNavigate();
-  const { state } = useGamePolling(code || null);
+  const { state } = useGamePolling(code || null, "host");
   const [submitting, setSubmitting] = useState(false);
   const { width, height } = useWindowSize();
 
@@ -137,6 +137,16 @@ const HostGamePage = () => {
             </div>
         )}
 
+        {state.status === "generating" && (
+            <div style={{ textAlign: "center" }}>
+                <h2>Round {state.round_number}</h2>
+                <div style={{ fontSize: "3em", margin: "40px 0", padding: 40, border: "4px solid #333", borderRadius: 16 }}>
+                    {state.question_text}
+                </div>
+                <p style={{ fontSize: "1.5em" }}>All answers are in! The Secret Clanker is writing its answer...</p>
+            </div>
+        )}
+
         {state.status === "voting" && (
             <div style={{ marginTop: 20 }}>
                 <div style={{ 
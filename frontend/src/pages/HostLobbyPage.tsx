@@ -7,7 +7,7 @@ import robotMascot from "../assets/Robot-Emoji.png";
 const HostLobbyPage = () => {
   const { code } = useParams<{ code: string }>();
   const navigate = useNavigate();
-  const { state } = useGamePolling(code || null);
+  const { state } = useGamePolling(code || null, "host");
   const [error, setError] = useState<string | null>(null);
   const [starting, setStarting] = useState(false);
 
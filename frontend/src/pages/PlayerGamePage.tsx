@@ -8,8 +8,8 @@ import { ScoreAnimation } from "../components/ScoreAnimation";
 
 const PlayerGamePage = () => {
   const { code } = useParams<{ code: string }>();
-  const { state } = useGamePolling(code || null);
   const playerId = sessionStorage.getItem("player_id");
+  const { state } = useGamePolling(code || null, "player");
   const player = state?.players.find((p: any) => p.id === playerId);
 
   const [questionText, setQuestionText] = useState("");
@@ -75,6 +75,7 @@ const PlayerGamePage = () => {
   const isWritingPhase = state.status === "write_questions";
   const doneWriting = submittedCount >= questionsNeeded;
   const isAnsweringPhase = state.status === "answering";
+  const isGeneratingPhase = state.status === "generating";
   const isVotingPhase = state.status === "voting";
   const isRevealPhase = state.status === "reveal";
   const isLeaderboardPhase = state.status === "leaderboard";
@@ -205,6 +206,13 @@ const PlayerGamePage = () => {
               </div>
           )}
 
+          {isGeneratingPhase && (
+              <div style={{ textAlign: "center", padding: 20 }}>
+                  <h2>All answers are in!</h2>
+                  <p>The Secret Clanker is writing its answer...</p>
+              </div>
+          )}
+
           {isVotingPhase && (
               <div style={{ width: "100%" }}>
                   <div style={{ textAlign: "center", marginBottom: 10 }}>